@@ -10,7 +10,14 @@ class Settings(BaseSettings):
 
     # Ollama Configuration (Local AI - Legacy, not used with cloud)
     OLLAMA_HOST: str
-    OLLAMA_MODEL: str
+    OLLAMA_MODEL: str = "qwen2.5vl:7b-q4_K_M"  # 4-bit for speed, 7b-q8_0 for accuracy
+    OLLAMA_KEEP_ALIVE: str = "30m"  # How long Ollama keeps the model loaded after a request
+
+    # Local mode LLM backend: "ollama", or "vllm" for an OpenAI-compatible vLLM/SGLang server
+    LOCAL_LLM_BACKEND: str = "ollama"
+    VLLM_URL: str = "http://localhost:8001/v1"
+    VLLM_MODEL: str = "Qwen/Qwen2.5-VL-7B-Instruct"
+    VLLM_API_KEY: str = "EMPTY"
 
     # Browser Use Cloud Configuration
     BROWSER_USE_API_KEY: str # Set in .env
@@ -20,12 +27,20 @@ class Settings(BaseSettings):
     APP_NAME: str = "SaaS Directory Agent"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
+    JSON_LOGS: bool = False  # One JSON object per log line, for log collectors
 
     # Authentication
     SECRET_KEY: str = ""
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Argon2id password hashing cost. Tune on the server so that timing
+    # app.utils.auth.pwd_context.hash("x") gives ~250-500 ms per login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    # Hashes computed at once; each holds ARGON2_MEMORY_COST, so keep it near the core count
+    PASSWORD_HASH_CONCURRENCY: int = 4
 
     # Encryption for directory credentials
     # Generate with: from cryptography.fernet import Fernet; Fernet.generate_key()
@@ -37,15 +52,44 @@ class Settings(BaseSettings):
     # Browser Automation
     HEADLESS_BROWSER: bool = True
     BROWSER_TIMEOUT: int = 30000
+    NAVIGATION_TIMEOUT: int = 15000  # Default for navigations without an explicit timeout
+    MAX_CONCURRENT_PAGES: int = 3  # Browser contexts (one per submission) open at once
+    BROWSER_POOL_SIZE: int = 2  # Chromium processes the submission contexts are spread over
+    # Relaunch the browsers after this many page checkouts to shed the memory a long-lived
+    # Chromium accumulates (0 disables)
+    BROWSER_RECYCLE_AFTER_PAGES: int = 200
+    SCREENSHOT_QUALITY: int = 80  # JPEG quality for automation screenshots
+    SCREENSHOT_ON_SUCCESS: bool = False  # Failed submissions are always captured
+    # Comma-separated request resource types aborted by the browser context. Stylesheets
+    # stay enabled: without them hidden fields render visible and screenshots mislead.
+    BLOCKED_RESOURCE_TYPES: str = "image,font,media,texttrack,manifest"
+    # Comma-separated ad/analytics domains answered with an empty 204 (subdomains included)
+    BLOCKED_DOMAINS: str = (
+        "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,"
+        "facebook.net,hotjar.com,segment.io,cdn.segment.com,mixpanel.com,fullstory.com,"
+        "clarity.ms,intercom.io,hs-analytics.net,hs-scripts.com,adservice.google.com"
+    )
 
     # AI Settings
     AI_TEMPERATURE: float = 0.1
     MAX_TOKENS: int = 4096
+    # Local browser agents: form filling is deterministic, so decode greedily and short
+    AGENT_TEMPERATURE: float = 0.0
+    AGENT_NUM_PREDICT: int = 512  # Max tokens generated per agent step
+    OLLAMA_NUM_CTX: int = 8192  # Context window; agent prompts carry page state
 
     # Workflow
     MAX_RETRIES: int = 3
     RETRY_DELAY: int = 300
     CONCURRENT_SUBMISSIONS: int = 3
+    BULK_SUBMIT_TIMEOUT: int = 3600  # Seconds before unfinished bulk submissions are cancelled
+    FORM_ANALYSIS_CACHE_TTL: int = 86400  # Seconds an AI form analysis is reused per URL
+    CLOUD_TASK_TIMEOUT: int = 600  # Seconds before a Browser Use Cloud task is stopped
+    # Skip a directory URL for CIRCUIT_COOLDOWN seconds after
+    # CIRCUIT_FAILURE_THRESHOLD agent failures within CIRCUIT_FAILURE_WINDOW seconds
+    CIRCUIT_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_FAILURE_WINDOW: int = 600
+    CIRCUIT_COOLDOWN: int = 300
 
     # File Upload
     UPLOAD_DIR: str = "./uploads"
@@ -60,6 +104,16 @@ class Settings(BaseSettings):
         """Parse CORS origins from comma-separated string"""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
 
+    @property
+    def blocked_resource_types(self) -> List[str]:
+        """Parse blocked resource types from comma-separated string"""
+        return [kind.strip() for kind in self.BLOCKED_RESOURCE_TYPES.split(",") if kind.strip()]
+
+    @property
+    def blocked_domains(self) -> List[str]:
+        """Parse blocked domains from comma-separated string"""
+        return [domain.strip() for domain in self.BLOCKED_DOMAINS.split(",") if domain.strip()]
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,4 +1,7 @@
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -6,6 +9,12 @@ from app.config import get_settings
 
 settings = get_settings()
 
+
+def _json_serializer(value) -> str:
+    """Encode JSON columns with orjson; non-string keys are stringified like json.dumps."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Windows-compatible connection string
 engine = create_engine(
     settings.DATABASE_URL,
@@ -13,12 +22,32 @@ engine = create_engine(
     pool_size=5,
     max_overflow=10,
     echo=settings.DEBUG,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
     # Windows-specific settings
     connect_args={"options": "-c timezone=utc"},
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine on the same database for the submission workflow, so DB round-trips
+# don't block the event loop while browser automation is running
+async_engine = create_async_engine(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    pool_pre_ping=True,
+    # Room for every concurrent submission's commits next to request and retry sessions
+    pool_size=settings.CONCURRENT_SUBMISSIONS + 5,
+    max_overflow=10,
+    pool_recycle=1800,
+    echo=settings.DEBUG,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    connect_args={"server_settings": {"timezone": "utc"}},
+)
+
+# Objects stay loaded after commit; lazy refreshes can't run outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -31,6 +60,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Async session dependency for routes that drive the submission workflow"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
@@ -5,12 +5,15 @@ FastAPI dependencies for authentication and authorization.
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, Request, status
-from jose import JWTError
+from jwt import PyJWTError
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import User
 from app.utils.auth import verify_token
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 async def get_current_user(request: Request, db: Annotated[Session, Depends(get_db)]) -> User:
@@ -56,13 +59,13 @@ async def get_current_user(request: Request, db: Annotated[Session, Depends(get_
         if user_id is None:
             raise credentials_exception
 
-    except JWTError as e:
+    except PyJWTError as e:
         raise credentials_exception from e
     except ValueError as e:
         raise credentials_exception from e
 
     # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -103,11 +106,6 @@ async def get_refresh_token(request: Request) -> str:
     """
     refresh_token = request.cookies.get("refresh_token")
 
-    # Debug logging
-    from app.utils.logger import get_logger
-
-    logger = get_logger(__name__)
-
     if not refresh_token:
         logger.warning(
             f"⚠️ Refresh token not found in cookies. Available cookies: {list(request.cookies.keys())}"
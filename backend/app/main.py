@@ -44,6 +44,22 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Database initialization failed: {e}")
         raise
 
+    if settings.USE_BROWSER_USE_CLOUD:
+        from app.services.browser_use_service import get_browser_use_service
+
+        # Fail at startup on a missing API key or SDK instead of on the first submission
+        get_browser_use_service()
+        logger.info("✅ Browser Use Cloud client ready")
+    else:
+        # Pre-warm the shared browser so the first local submission skips the cold start
+        from app.services.browser_automation import get_browser
+
+        try:
+            await get_browser()
+            logger.info("✅ Browser pre-warmed")
+        except Exception as e:
+            logger.warning(f"⚠️  Browser pre-warm failed, will retry on first use: {e}")
+
     logger.info("🔐 Authentication: JWT with httpOnly cookies")
     logger.info(f"🤖 AI: Ollama ({settings.OLLAMA_MODEL})")
     logger.info(f"🌍 Server: http://{settings.HOST}:{settings.PORT}")
@@ -54,6 +70,15 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down...")
 
+    if not settings.USE_BROWSER_USE_CLOUD:
+        from app.services.browser_automation import close_browser
+        from app.services.browser_manager import shutdown_playwright
+        from app.services.browser_use_service import close_local_browser
+
+        await close_browser()
+        await close_local_browser()
+        await shutdown_playwright()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -16,7 +16,7 @@ from app.utils.auth import (
     create_access_token,
     create_refresh_token,
     get_password_hash,
-    verify_password,
+    verify_and_update_password,
     verify_token,
 )
 from app.utils.logger import get_logger
@@ -99,7 +99,7 @@ async def register(user_data: UserCreate, db: Annotated[Session, Depends(get_db)
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     db_user = UserModel(
         email=user_data.email,
         username=user_data.username,
@@ -134,13 +134,23 @@ async def login(response: Response, credentials: UserLogin, db: Annotated[Sessio
     # Find user by email
     user = db.query(UserModel).filter(UserModel.email == credentials.email).first()
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    password_valid, new_hash = (
+        await verify_and_update_password(credentials.password, user.hashed_password)
+        if user
+        else (False, None)
+    )
+    if not password_valid:
         logger.warning(f"❌ Failed login attempt for email: {credentials.email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    if new_hash:
+        # Migrate bcrypt or older Argon2 hashes to the current parameters
+        user.hashed_password = new_hash
+        db.commit()
+
     if not user.is_active:
         logger.warning(f"❌ Login attempted for inactive user: {user.id}")
         raise HTTPException(
@@ -231,7 +241,7 @@ async def refresh_token(
             )
 
         # Verify user exists and is active
-        user = db.query(UserModel).filter(UserModel.id == user_id).first()
+        user = db.get(UserModel, user_id)
         if not user or not user.is_active:
             logger.error(f"❌ User not found or inactive: {user_id}")
             raise HTTPException(
@@ -2,10 +2,11 @@ from datetime import datetime
 from typing import Annotated, List
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.dependencies import get_current_active_user
 from app.models import Directory, SaasProduct, Submission, SubmissionStatus, User
 from app.schemas import (
@@ -25,26 +26,24 @@ router = APIRouter()
 async def create_submission(
     submission: SubmissionCreate,
     background_tasks: BackgroundTasks,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     current_user: Annotated[User, Depends(get_current_active_user)],
 ):
     """Create and execute a new submission for the authenticated user"""
     # Verify user owns the SaaS product and directory
-    saas = (
-        db.query(SaasProduct)
-        .filter(
+    saas = await db.scalar(
+        select(SaasProduct).where(
             SaasProduct.id == submission.saas_product_id,
             SaasProduct.user_id == current_user.id,
         )
-        .first()
     )
     if not saas:
         raise HTTPException(status_code=404, detail="SaaS product not found")
 
-    directory = (
-        db.query(Directory)
-        .filter(Directory.id == submission.directory_id, Directory.user_id == current_user.id)
-        .first()
+    directory = await db.scalar(
+        select(Directory).where(
+            Directory.id == submission.directory_id, Directory.user_id == current_user.id
+        )
     )
     if not directory:
         raise HTTPException(status_code=404, detail="Directory not found")
@@ -64,25 +63,27 @@ async def create_submission(
 @router.post("/bulk", response_model=List[SubmissionSchema])
 async def bulk_submit(
     request: BulkSubmissionRequest,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     current_user: Annotated[User, Depends(get_current_active_user)],
 ):
     """Submit to multiple directories at once for the authenticated user"""
     # Verify user owns the SaaS product
-    saas = (
-        db.query(SaasProduct)
-        .filter(SaasProduct.id == request.saas_product_id, SaasProduct.user_id == current_user.id)
-        .first()
+    saas = await db.scalar(
+        select(SaasProduct).where(
+            SaasProduct.id == request.saas_product_id, SaasProduct.user_id == current_user.id
+        )
     )
     if not saas:
         raise HTTPException(status_code=404, detail="SaaS product not found")
 
     # Verify user owns all directories
     directories = (
-        db.query(Directory)
-        .filter(Directory.id.in_(request.directory_ids), Directory.user_id == current_user.id)
-        .all()
-    )
+        await db.scalars(
+            select(Directory).where(
+                Directory.id.in_(request.directory_ids), Directory.user_id == current_user.id
+            )
+        )
+    ).all()
     if len(directories) != len(request.directory_ids):
         raise HTTPException(status_code=404, detail="One or more directories not found")
 
@@ -232,14 +233,14 @@ async def update_submission(
 @router.post("/{submission_id}/retry", response_model=SubmissionSchema)
 async def retry_submission(
     submission_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     current_user: Annotated[User, Depends(get_current_active_user)],
 ):
     """Manually retry a failed submission owned by the authenticated user"""
-    submission = (
-        db.query(Submission)
-        .filter(Submission.id == submission_id, Submission.user_id == current_user.id)
-        .first()
+    submission = await db.scalar(
+        select(Submission).where(
+            Submission.id == submission_id, Submission.user_id == current_user.id
+        )
     )
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
@@ -91,6 +91,7 @@ class AIFormReader:
         """
         Analyze form structure from HTML content.
         Works with both cloud (Browser Use) and local (Ollama) modes.
+        Expects HTML already normalized and truncated by clean_form_html.
         """
         try:
             if self.use_cloud:
@@ -145,7 +146,7 @@ class AIFormReader:
             - pricing_model: Pricing information
 
             HTML CONTENT FROM {url}:
-            {html_content[:8000]}
+            {html_content}
 
             OUTPUT FORMAT:
             Return ONLY a valid JSON object (no markdown, no explanations) with this exact structure:
@@ -185,51 +186,6 @@ class AIFormReader:
         logger.info(f"AI Raw Response: {result[:500]}...")
         return self._parse_ai_response(result)
 
-    def _create_form_analysis_prompt(self, html_content: Optional[str] = None) -> str:
-        """Create prompt for form analysis"""
-        prompt = """Analyze this web form screenshot and identify ALL input fields
-            for submitting a SaaS product.
-
-            Common fields to find:
-            - Company/Product Name
-            - Website URL
-            - Email
-            - Description (short/long)
-            - Category
-            - Logo upload
-            - Social media links
-            - Pricing
-
-            For EACH field provide:
-            1. Standardized field_name: company_name, website_url, contact_email,
-            description, short_description, category, logo, twitter_url,
-            linkedin_url, pricing_model
-            2. Field type: text, email, url, textarea, file, select
-            3. Is it required? (look for * or "required")
-            4. Visible label/placeholder
-            5. CSS selector to target it
-
-            Return ONLY valid JSON:
-            {
-                "fields": [
-                    {
-                        "field_name": "company_name",
-                        "field_type": "text",
-                        "field_label": "Company Name",
-                        "selector": "#company-name",
-                        "is_required": true,
-                        "confidence_score": 95
-                    }
-                ],
-                "submit_button_selector": "button[type='submit']",
-                "additional_notes": "any special requirements"
-            }"""
-
-        if html_content:
-            prompt += f"\n\nHTML context:\n{html_content[:5000]}"
-
-        return prompt
-
     def _parse_ai_response(self, response: str) -> Dict:
         """Parse and validate AI response with robust JSON extraction"""
         try:
@@ -8,7 +8,11 @@ This is a simplified facade that delegates to specialized modules:
 - URLSubmissionHandler: URL-first submission pattern
 """
 
-from typing import Any, Dict, Optional
+import asyncio
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from playwright.async_api import Page
 
 from app.config import get_settings
 from app.services.browser_manager import BrowserManager
@@ -36,34 +40,68 @@ class BrowserAutomation:
         self.browser_manager = BrowserManager()
         self.settings = settings
 
+        # Handlers share the browser manager, so they are built once per initialize()
+        self.login_handler: Optional[LoginHandler] = None
+        self.form_filler: Optional[FormFiller] = None
+        self.url_handler: Optional[URLSubmissionHandler] = None
+
     async def __aenter__(self):
-        await self.browser_manager.initialize()
+        await self.initialize()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.browser_manager.close()
+        await self.close()
 
     async def initialize(self):
-        """Initialize browser."""
+        """Initialize browser and the handlers sharing its context."""
         await self.browser_manager.initialize()
 
+        if self.form_filler is None:
+            timeout = self.settings.BROWSER_TIMEOUT
+            self.login_handler = LoginHandler(self.browser_manager, timeout)
+            self.form_filler = FormFiller(self.browser_manager, timeout)
+            self.url_handler = URLSubmissionHandler(self.browser_manager, timeout)
+
     async def close(self):
-        """Close browser."""
+        """Close browser and drop handlers bound to its context."""
         await self.browser_manager.close()
+        self.login_handler = None
+        self.form_filler = None
+        self.url_handler = None
+
+    def acquire_page(self, storage_state: Optional[str] = None) -> AbstractAsyncContextManager[Page]:
+        """
+        Open a page in a fresh, isolated context for a whole submission.
+
+        Pass it to the step methods below so login, URL-first, analysis and form filling
+        share one page and its session instead of each opening their own. The context,
+        cookies included, is closed when the submission is done; pass a
+        session_state_path() to keep the submitting user's session for that site.
+        """
+        return self.browser_manager.acquire_page(storage_state)
 
     async def login_if_required(
         self,
         login_url: Optional[str],
         username: Optional[str],
         password: Optional[str],
+        page: Optional[Page] = None,
     ) -> bool:
         """Handle login if directory requires authentication."""
-        login_handler = LoginHandler(self.browser_manager.context, self.settings.BROWSER_TIMEOUT)
-        return await login_handler.login_if_required(login_url, username, password)
+        return await self.login_handler.login_if_required(login_url, username, password, page)
 
-    async def navigate_and_screenshot(self, url: str) -> tuple[str, str]:
+    async def navigate_and_screenshot(
+        self,
+        url: str,
+        load_assets: bool = False,
+        full_page: bool = False,
+        image_format: Literal["jpeg", "png"] = "jpeg",
+        page: Optional[Page] = None,
+    ) -> tuple[str, str]:
         """Navigate to URL and take screenshot."""
-        return await self.browser_manager.navigate_and_screenshot(url)
+        return await self.browser_manager.navigate_and_screenshot(
+            url, load_assets, full_page, image_format, page
+        )
 
     async def fill_and_submit_form(
         self,
@@ -72,11 +110,29 @@ class BrowserAutomation:
         submit_button_selector: Optional[str] = None,
         is_multi_step: bool = False,
         step_count: int = 1,
+        page: Optional[Page] = None,
     ) -> Dict:
         """Fill and submit form with support for multi-step forms."""
-        form_filler = FormFiller(self.browser_manager.context, self.settings.BROWSER_TIMEOUT)
-        return await form_filler.fill_and_submit_form(
-            url, field_mapping, submit_button_selector, is_multi_step, step_count
+        return await self.form_filler.fill_and_submit_form(
+            url, field_mapping, submit_button_selector, is_multi_step, step_count, page
+        )
+
+    async def submit_many(self, jobs: List[Dict[str, Any]]) -> List[Union[Dict, BaseException]]:
+        """
+        Fill and submit several forms concurrently, each in its own context.
+
+        At most MAX_CONCURRENT_PAGES contexts are open at once; extra jobs wait for one
+        to be closed.
+
+        Args:
+            jobs: Keyword arguments for fill_and_submit_form, one dict per form
+
+        Returns:
+            One result per job, in order. A job that raised yields its exception.
+        """
+        await self.initialize()
+        return await asyncio.gather(
+            *(self.fill_and_submit_form(**job) for job in jobs), return_exceptions=True
         )
 
     async def submit_url_first_step(
@@ -85,11 +141,29 @@ class BrowserAutomation:
         website_url: str,
         url_field_selector: Optional[str] = None,
         url_submit_selector: Optional[str] = None,
+        page: Optional[Page] = None,
     ) -> str:
         """Handle two-step submission where URL is submitted first."""
-        url_handler = URLSubmissionHandler(
-            self.browser_manager.context, self.settings.BROWSER_TIMEOUT
-        )
-        return await url_handler.submit_url_first_step(
-            initial_url, website_url, url_field_selector, url_submit_selector
+        return await self.url_handler.submit_url_first_step(
+            initial_url, website_url, url_field_selector, url_submit_selector, page
         )
+
+
+_shared_browser: Optional[BrowserAutomation] = None
+
+
+async def get_browser() -> BrowserAutomation:
+    """Return the process-wide browser, launching it on first use."""
+    global _shared_browser
+    if _shared_browser is None:
+        _shared_browser = BrowserAutomation()
+    await _shared_browser.initialize()
+    return _shared_browser
+
+
+async def close_browser():
+    """Shut down the process-wide browser if it was started."""
+    global _shared_browser
+    if _shared_browser is not None:
+        await _shared_browser.close()
+        _shared_browser = None
@@ -5,10 +5,25 @@ Handles browser initialization, context creation, and cleanup.
 """
 
 import asyncio
+import json
+import os
+import re
 import sys
-from typing import Optional
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Literal, Optional
+from urllib.parse import urlsplit
 
-from playwright.async_api import Browser, BrowserContext, async_playwright
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    Route,
+    async_playwright,
+)
+from playwright.async_api import Error as PlaywrightError
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from app.config import get_settings
@@ -17,16 +32,143 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 settings = get_settings()
 
+LAUNCH_ARGS = (
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-features=Translate,BackForwardCache,CalculateNativeWinOcclusion,InterestCohort",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+)
+CONTEXT_OPTIONS = {
+    "viewport": {"width": 1920, "height": 1080},
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "accept_downloads": True,
+}
+
+# Remembers which Chromium channel launched successfully, so a known-bad channel
+# is not retried on every start
+_LAUNCH_CACHE_PATH = Path.home() / ".cache" / "saas_directory_agent" / "browser_launch.json"
+_UNKNOWN_CHANNEL = object()
+_launch_channel = _UNKNOWN_CHANNEL
+
+
+def _cached_launch_channel():
+    """Return the last working channel (None for bundled Chromium) or _UNKNOWN_CHANNEL."""
+    global _launch_channel
+    if _launch_channel is _UNKNOWN_CHANNEL:
+        try:
+            _launch_channel = json.loads(_LAUNCH_CACHE_PATH.read_text())["channel"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    return _launch_channel
+
+
+def _remember_launch_channel(channel: Optional[str]):
+    """Persist the channel that launched successfully."""
+    global _launch_channel
+    if _launch_channel == channel:
+        return
+
+    _launch_channel = channel
+    try:
+        _LAUNCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _LAUNCH_CACHE_PATH.write_text(json.dumps({"channel": channel}))
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache browser launch channel: {str(e)}")
+
+
+# One Playwright driver (a Node.js subprocess) serves every manager in the process
+_playwright: Optional[Playwright] = None
+_playwright_lock = asyncio.Lock()
+
+
+async def get_playwright() -> Playwright:
+    """Return the process-wide Playwright driver, starting it on first use."""
+    global _playwright
+    async with _playwright_lock:
+        if _playwright is None:
+            _playwright = await async_playwright().start()
+        return _playwright
+
+
+async def shutdown_playwright():
+    """Stop the shared Playwright driver. Call once at application shutdown."""
+    global _playwright
+    async with _playwright_lock:
+        if _playwright is None:
+            return
+        try:
+            await _playwright.stop()
+        except Exception as e:
+            logger.error(f"❌ Error stopping playwright: {str(e)}")
+        finally:
+            _playwright = None
+
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^a-z0-9.-]")
+
+
+def session_state_path(user_id: int, url: str) -> str:
+    """
+    Storage-state file holding one user's cookies and localStorage for one site.
+
+    Args:
+        user_id: User the session belongs to
+        url: Any URL on the site; only its host is used
+
+    Returns:
+        Path under UPLOAD_DIR, keyed by (user_id, host) so no two users share a session
+    """
+    host = _UNSAFE_FILENAME_RE.sub("_", urlsplit(url).hostname or "unknown")
+    return os.path.join(settings.UPLOAD_DIR, "browser_state", str(user_id), f"{host}.json")
+
+
+def _save_storage_state(path: str, state: dict):
+    """Write a storage state atomically, readable by the owner only (it holds cookies)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _is_blocked_host(url: str, blocked_domains: frozenset[str]) -> bool:
+    """Check whether the URL's host or any parent domain is in the deny-list."""
+    host = urlsplit(url).hostname or ""
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in blocked_domains for i in range(len(parts) - 1))
+
 
 class BrowserManager:
-    """Manages Playwright browser lifecycle and persistent contexts."""
+    """
+    Manages a pool of Playwright browsers and the isolated contexts handed out from it.
+
+    Every borrowed page lives in its own fresh context, so no two submissions share
+    cookies, localStorage or cache, even when they target the same site. Contexts are
+    spread over BROWSER_POOL_SIZE browsers, so a crashed browser only takes down the
+    submissions running on it.
+    """
 
     def __init__(self):
         self.playwright = None
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
+        self.browsers: list[Browser] = []
+        # Open contexts per browser, new contexts go to the least busy one
+        self._open_contexts: dict[Browser, int] = {}
+        self.screenshot_dir = os.path.join(settings.UPLOAD_DIR, "screenshots")
         self.settings = settings
         self._lock = asyncio.Lock()
+        # Caps the contexts open at once
+        self._context_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_PAGES)
+        self._pages_served = 0
+        self._active_borrowers = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._recycle_lock = asyncio.Lock()
+        self._blocked_resource_types = frozenset(settings.blocked_resource_types)
+        self._blocked_domains = frozenset(settings.blocked_domains)
 
     async def __aenter__(self):
         await self.initialize()
@@ -36,107 +178,248 @@ class BrowserManager:
         await self.close()
 
     async def initialize(self):
-        """Initialize Playwright browser and create persistent context."""
+        """Launch the pool of browsers that submission contexts are opened on."""
         async with self._lock:
-            if self.browser and self.context:
+            if self.browsers:
                 return
 
             try:
-                self.playwright = await async_playwright().start()
-
-                launch_options = {
-                    "headless": self.settings.HEADLESS_BROWSER,
-                    "args": [
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",
-                        "--disable-blink-features=AutomationControlled",
-                    ],
-                }
-
-                if sys.platform == "win32":
-                    launch_options["channel"] = "chrome"
+                os.makedirs(self.screenshot_dir, exist_ok=True)
+                self.playwright = await get_playwright()
 
-                try:
-                    self.browser = await self.playwright.chromium.launch(**launch_options)
-                except Exception:
-                    launch_options.pop("channel", None)
-                    self.browser = await self.playwright.chromium.launch(**launch_options)
-
-                # Create persistent context (maintains cookies and sessions)
-                self.context = await self.browser.new_context(
-                    viewport={"width": 1920, "height": 1080},
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    accept_downloads=True,
+                # No profile directory: nothing on disk is shared between worker processes
+                self.browsers = list(
+                    await asyncio.gather(
+                        *(self._launch_browser() for _ in range(self.settings.BROWSER_POOL_SIZE))
+                    )
                 )
+                self._open_contexts = dict.fromkeys(self.browsers, 0)
 
-                logger.info("✅ Browser initialized with persistent context")
+                logger.info(f"✅ Browser pool initialized with {len(self.browsers)} browsers")
 
             except Exception as e:
                 logger.error(f"❌ Browser initialization failed: {str(e)}")
                 raise RuntimeError(f"Browser initialization failed: {str(e)}") from e
 
+    async def _launch_browser(self) -> Browser:
+        """Launch Chromium, using the channel that worked last time."""
+        channel = _cached_launch_channel()
+        if channel is _UNKNOWN_CHANNEL:
+            channel = "chrome" if sys.platform == "win32" else None
+
+        launch_options = {"headless": self.settings.HEADLESS_BROWSER, "args": LAUNCH_ARGS}
+        launch = self.playwright.chromium.launch
+        try:
+            browser = await launch(**launch_options, channel=channel)
+        except Exception:
+            if channel is None:
+                raise
+            channel = None
+            browser = await launch(**launch_options)
+
+        _remember_launch_channel(channel)
+        return browser
+
     async def close(self):
-        """Close browser and playwright resources."""
+        """Close the browsers; the shared Playwright driver keeps running."""
         async with self._lock:
-            try:
-                if self.context:
-                    await self.context.close()
-                    self.context = None
-                if self.browser:
-                    await self.browser.close()
-                    self.browser = None
-                if self.playwright:
-                    await self.playwright.stop()
-                    self.playwright = None
-            except Exception as e:
-                logger.error(f"❌ Error closing browser: {str(e)}")
+            # Closing a browser closes its contexts too
+            for browser in self.browsers:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    logger.error(f"❌ Error closing browser: {str(e)}")
+            self.browsers = []
+            self._open_contexts = {}
+
+            # The Playwright driver is shared, it is stopped by shutdown_playwright()
+            self.playwright = None
 
     async def new_page(self):
-        """Create a new page in the persistent context."""
-        if not self.context:
+        """Create a new page in its own context; closing the page closes the context."""
+        if not self.browsers:
             await self.initialize()
-        return await self.context.new_page()
+        browser = await self._pick_browser()
+        return await browser.new_page(**CONTEXT_OPTIONS)
 
-    async def navigate_and_screenshot(self, url: str) -> tuple[str, str]:
+    @asynccontextmanager
+    async def acquire_page(self, storage_state: Optional[str] = None) -> AsyncIterator[Page]:
         """
-        Navigate to URL and take screenshot.
+        Open a page in a fresh context for one submission and close the context afterwards.
 
-        Args:
-            url: Target URL
+        Waits while MAX_CONCURRENT_PAGES contexts are already open.
 
-        Returns:
-            Tuple of (screenshot_path, html_content)
+        Args:
+            storage_state: Optional session file from session_state_path(). The context
+                starts from it if it exists and writes its cookies back to it when closed,
+                so a user's login to a site carries over to their next submission there.
         """
-        import os
-        from datetime import datetime
+        recycle_after = self.settings.BROWSER_RECYCLE_AFTER_PAGES
+        if recycle_after and self._pages_served >= recycle_after:
+            await self._recycle()
+
+        # Counted before waiting for a slot, so a recycle never closes the browser
+        # under a caller that is about to open a context
+        self._active_borrowers += 1
+        self._idle.clear()
+        try:
+            if not self.browsers:
+                await self.initialize()
+
+            async with self._context_slots:
+                browser = await self._pick_browser()
+                context = await self._new_context(browser, storage_state)
+                self._open_contexts[browser] = self._open_contexts.get(browser, 0) + 1
+                self._pages_served += 1
+                try:
+                    yield await context.new_page()
+                finally:
+                    await self._close_context(context, storage_state)
+                    if browser in self._open_contexts:
+                        self._open_contexts[browser] -= 1
+        finally:
+            self._active_borrowers -= 1
+            if not self._active_borrowers:
+                self._idle.set()
+
+    async def _recycle(self):
+        """Relaunch the browser once no page is borrowed."""
+        async with self._recycle_lock:
+            if self._pages_served < self.settings.BROWSER_RECYCLE_AFTER_PAGES:
+                return  # Another caller recycled while this one waited for the lock
 
-        if not self.context:
+            # New callers queue on the lock meanwhile, so the current ones drain
+            await self._idle.wait()
+            logger.info(f"♻️ Relaunching browser after {self._pages_served} pages")
+            await self.close()
             await self.initialize()
+            self._pages_served = 0
+
+    @asynccontextmanager
+    async def use_page(self, page: Optional[Page] = None) -> AsyncIterator[Page]:
+        """Use the caller's page if one is given, otherwise open one in a fresh context."""
+        if page is not None:
+            yield page
+            return
+
+        async with self.acquire_page() as pooled_page:
+            yield pooled_page
+
+    async def _pick_browser(self) -> Browser:
+        """Return the least busy browser of the pool, relaunching any that crashed."""
+        async with self._lock:
+            for index, browser in enumerate(self.browsers):
+                if not browser.is_connected():
+                    logger.warning("⚠️ Pooled browser disconnected, relaunching it")
+                    self._open_contexts.pop(browser, None)
+                    self.browsers[index] = await self._launch_browser()
+                    self._open_contexts[self.browsers[index]] = 0
+            return min(self.browsers, key=lambda browser: self._open_contexts.get(browser, 0))
+
+    async def _new_context(
+        self, browser: Browser, storage_state: Optional[str] = None
+    ) -> BrowserContext:
+        """Open an isolated context with the automation's defaults and request blocking."""
+        if storage_state and not os.path.exists(storage_state):
+            storage_state = None  # First submission of this user to this site
+        context = await browser.new_context(**CONTEXT_OPTIONS, storage_state=storage_state)
+
+        # Bounds implicit navigation waits (load states, navigations after clicks)
+        context.set_default_navigation_timeout(self.settings.NAVIGATION_TIMEOUT)
 
-        page = await self.context.new_page()
+        # Skip assets and trackers that the automation never reads
+        if self._blocked_resource_types or self._blocked_domains:
+            await context.route("**/*", self._block_heavy_requests)
+
+        return context
+
+    async def _close_context(self, context: BrowserContext, storage_state: Optional[str] = None):
+        """Close a submission's context, saving its session first if a file is given."""
+        if storage_state:
+            try:
+                _save_storage_state(storage_state, await context.storage_state())
+            except (PlaywrightError, OSError) as e:
+                logger.warning(f"⚠️ Could not save browser session: {str(e)}")
 
         try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=self.settings.BROWSER_TIMEOUT)
-            await page.wait_for_load_state("networkidle", timeout=10000)
-            await asyncio.sleep(2)
+            await context.close()
+        except PlaywrightError as e:
+            # Already gone if the browser was closed or crashed meanwhile
+            logger.warning(f"⚠️ Could not close browser context: {str(e)}")
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_dir = os.path.join(self.settings.UPLOAD_DIR, "screenshots")
-            os.makedirs(screenshot_dir, exist_ok=True)
+    async def _block_heavy_requests(self, route: Route):
+        """Drop blocked resource types and stub trackers, let everything else through."""
+        request = route.request
+        if _is_blocked_host(request.url, self._blocked_domains):
+            await route.fulfill(status=204, body="")
+        elif request.resource_type in self._blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
 
-            screenshot_path = os.path.join(screenshot_dir, f"form_{timestamp}.png")
-            await page.screenshot(path=screenshot_path, full_page=True)
+    async def _block_trackers_only(self, route: Route):
+        """Page-level override of the context route that keeps assets but still stubs trackers."""
+        if _is_blocked_host(route.request.url, self._blocked_domains):
+            # An empty 204 resolves at once, scripts waiting on the tracker don't see an error
+            await route.fulfill(status=204, body="")
+        else:
+            await route.continue_()
 
-            html_content = await page.content()
+    async def navigate_and_screenshot(
+        self,
+        url: str,
+        load_assets: bool = False,
+        full_page: bool = False,
+        image_format: Literal["jpeg", "png"] = "jpeg",
+        page: Optional[Page] = None,
+    ) -> tuple[str, str]:
+        """
+        Navigate to URL and take screenshot.
 
-            return screenshot_path, html_content
+        Args:
+            url: Target URL
+            load_assets: Load images, fonts and media for a pixel-accurate screenshot
+            full_page: Capture the whole scrollable page instead of the viewport
+            image_format: "jpeg" (default) or lossless "png" for OCR/diffing consumers
+            page: Page to navigate, opened in a fresh context if not given
 
-        except PlaywrightTimeoutError:
-            logger.error(f"❌ Timeout navigating to {url}")
-            raise
-        except Exception as e:
-            logger.error(f"❌ Error navigating to {url}: {str(e)}")
-            raise
-        finally:
-            await page.close()
+        Returns:
+            Tuple of (screenshot_path, html_content)
+        """
+        async with self.use_page(page) as page:
+            if load_assets:
+                # Page routes take precedence over the context route
+                await page.route("**/*", self._block_trackers_only)
+            try:
+                await page.goto(
+                    url, wait_until="domcontentloaded", timeout=self.settings.BROWSER_TIMEOUT
+                )
+                try:
+                    # Let late images/styles land so the screenshot is complete
+                    await page.wait_for_function("document.readyState === 'complete'", timeout=3000)
+                except PlaywrightTimeoutError:
+                    logger.debug(f"Page not fully loaded after 3s, continuing: {url}")
+
+                extension = "jpg" if image_format == "jpeg" else "png"
+                # Random names keep concurrent captures in the same second from colliding
+                screenshot_path = f"{self.screenshot_dir}/form_{uuid.uuid4().hex[:12]}.{extension}"
+                await page.screenshot(
+                    path=screenshot_path,
+                    type=image_format,
+                    quality=self.settings.SCREENSHOT_QUALITY if image_format == "jpeg" else None,
+                    full_page=full_page,
+                )
+
+                html_content = await page.content()
+
+                return screenshot_path, html_content
+
+            except PlaywrightTimeoutError:
+                logger.error(f"❌ Timeout navigating to {url}")
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error navigating to {url}: {str(e)}")
+                raise
+            finally:
+                if load_assets:
+                    await page.unroute("**/*", self._block_trackers_only)
@@ -5,22 +5,43 @@ Provides AI-powered browser automation.
 Supports both cloud API (default) and local Ollama modes.
 - Cloud: Uses browser-use-sdk for Browser Use Cloud API
 - Local: Uses browser-use library with Ollama LLM
+
+For local mode, run the Ollama server with OLLAMA_NUM_PARALLEL=8 (or at least
+CONCURRENT_SUBMISSIONS) so concurrent agents are batched instead of queued, and
+OLLAMA_KEEP_ALIVE=30m so the model stays loaded between submissions.
 """
 
+import asyncio
+import json
 import logging
 import os
+import re
+from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
-from browser_use_sdk import AsyncBrowserUse
+import httpx
+from cachetools import TTLCache
 
 from app.config import get_settings
+from app.utils.circuit_breaker import CircuitBreaker
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Stops running agents against a directory URL that keeps failing
+_submission_breaker = CircuitBreaker(
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    window_seconds=settings.CIRCUIT_FAILURE_WINDOW,
+    cooldown_seconds=settings.CIRCUIT_COOLDOWN,
+)
+
+# Successful form analyses per URL; expires so changed form layouts get re-analyzed
+_form_analysis_cache: TTLCache = TTLCache(maxsize=256, ttl=settings.FORM_ANALYSIS_CACHE_TTL)
+
 
 def make_json_serializable(obj: Any) -> Any:
     """
@@ -63,6 +84,205 @@ def make_json_serializable(obj: Any) -> Any:
         return str(obj)
 
 
+def _serialize_agent_result(result: Any) -> Any:
+    """Convert an agent/TaskView result into JSON-safe data."""
+    if result is None:
+        return None
+    # Use mode='json' and then recursively convert any remaining datetime objects
+    if hasattr(result, "model_dump"):
+        data = result.model_dump(mode="json")
+    elif hasattr(result, "dict"):
+        data = result.dict()
+    else:
+        data = str(result)
+    return make_json_serializable(data)
+
+
+@dataclass(slots=True)
+class SubmissionResult:
+    """
+    Outcome of an agent submission.
+
+    The raw agent output can hold full step traces, so it is only serialized when
+    agent_result or to_dict(include_raw=True) is used.
+    """
+
+    success: bool
+    message: str
+    screenshot_path: Optional[str] = None
+    raw: Any = None
+
+    @property
+    def agent_result(self) -> Any:
+        """JSON-safe form of the raw agent output."""
+        return _serialize_agent_result(self.raw)
+
+    def to_dict(self, include_raw: bool = False) -> Dict:
+        """Plain dict for API responses, without the agent output unless requested."""
+        data = {
+            "success": self.success,
+            "message": self.message,
+            "screenshot_path": self.screenshot_path,
+        }
+        if include_raw:
+            data["agent_result"] = self.agent_result
+        return data
+
+
+# Long free-text values (descriptions, feature lists) are capped to keep prompts short
+PROMPT_VALUE_MAX_CHARS = 400
+_WHITESPACE_RE = re.compile(r"\s+")
+_MULTI_STEP_RE = re.compile(r"multi[-\s]step|multiple\s+steps", re.IGNORECASE)
+
+# Constant text comes before any per-submission data so LLM servers with prefix
+# caching can reuse the KV cache of the shared part across submissions.
+_TASK_PROMPT_TEMPLATE = """
+            You are filling out a directory submission form.
+
+            Instructions:
+            1. Identify all form fields on the page
+            2. Match the provided data to the appropriate form fields
+            3. Fill in each field with the corresponding value
+            4. Handle any dropdowns, checkboxes, or special input types
+            5. If there are multiple steps, complete each step in order
+            6. Submit the form when all fields are filled
+            7. Wait for confirmation or success message
+
+            Be thorough and accurate. If a field is not found, skip it and continue with others.
+
+            Please find the form on this page and fill in the following information
+            (JSON object, keys are the data field names):
+
+            ```json
+            {fields_text}
+            ```
+            """
+
+
+# Shared rules for the unified login + submission task
+_SUBMISSION_INSTRUCTIONS = """You are performing a directory submission task. Complete ALL steps in order within this single browser session.
+
+            IMPORTANT:
+            - Complete all steps in sequence without closing the browser
+            - If login is required, stay logged in for the submission
+            - Wait for each page to fully load before proceeding
+            - If a field cannot be found, skip it and continue
+            - Submit the form and wait for confirmation"""
+
+
+def _truncate(value: str, max_chars: int = PROMPT_VALUE_MAX_CHARS) -> str:
+    """Collapse whitespace and cut long values on a word boundary."""
+    value = _WHITESPACE_RE.sub(" ", value).strip()
+    if len(value) <= max_chars:
+        return value
+    return value[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def _prompt_value(value: Any) -> str:
+    """
+    Encode one form value as compact JSON for the prompt.
+
+    Strings are whitespace-collapsed and capped. Lists and dicts (categories, tags, social
+    links) stay JSON arrays/objects; one too long to fit is passed as its capped JSON text.
+    """
+    if isinstance(value, str):
+        return json.dumps(_truncate(value), ensure_ascii=False)
+
+    encoded = json.dumps(make_json_serializable(value), separators=(",", ":"), ensure_ascii=False)
+    if len(encoded) > PROMPT_VALUE_MAX_CHARS:
+        return json.dumps(_truncate(encoded), ensure_ascii=False)
+    return encoded
+
+
+@lru_cache(maxsize=512)
+def _render_task_prompt(fields: Tuple[Tuple[str, str], ...]) -> str:
+    """Render the form-filling prompt; identical product data reuses the cached string."""
+    # Compact JSON costs fewer tokens than prose bullets. Values arrive already encoded.
+    fields_text = (
+        "{"
+        + ",".join(f"{json.dumps(key, ensure_ascii=False)}:{value}" for key, value in fields)
+        + "}"
+    )
+    return _TASK_PROMPT_TEMPLATE.format(fields_text=fields_text)
+
+
+@lru_cache(maxsize=1)
+def _get_cloud_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive HTTP pool for Browser Use Cloud API calls."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=120),
+        # Long read timeout: waiting on a task can take minutes
+        timeout=httpx.Timeout(connect=5, read=300, write=30, pool=30),
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_agent_cls():
+    """Import browser_use.Agent on first use; only local mode needs the library."""
+    from browser_use import Agent
+
+    return Agent
+
+
+@lru_cache(maxsize=1)
+def _get_local_browser():
+    """
+    Return the browser shared by local-mode agents.
+
+    Each agent run opens its own context on it, so a submission costs a new tab
+    instead of a Chromium launch. An agent given a browser leaves it running.
+    """
+    from browser_use import Browser, BrowserConfig
+
+    return Browser(config=BrowserConfig(headless=settings.HEADLESS_BROWSER))
+
+
+async def close_local_browser():
+    """Close the shared local-mode browser if one was started. Call at shutdown."""
+    if _get_local_browser.cache_info().currsize:
+        await _get_local_browser().close()
+        _get_local_browser.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def _get_local_llm():
+    """
+    Return the shared chat model for local mode.
+
+    One instance means one underlying HTTP client, so agents reuse its
+    keep-alive connections instead of opening new ones per submission.
+
+    With LOCAL_LLM_BACKEND="vllm" the agents talk to a vLLM (or SGLang) server through
+    its OpenAI-compatible API. Serve it with LMCache enabled (e.g. LMCACHE_CHUNK_SIZE=256,
+    kv_role=kv_both) so the shared instruction prefix of every prompt is served from
+    cached KV instead of being prefilled again.
+    """
+    if settings.LOCAL_LLM_BACKEND == "vllm":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=settings.VLLM_MODEL,
+            base_url=settings.VLLM_URL,
+            api_key=settings.VLLM_API_KEY,
+            temperature=settings.AGENT_TEMPERATURE,
+            max_tokens=settings.AGENT_NUM_PREDICT,
+        )
+
+    from langchain_ollama import ChatOllama
+
+    # Agent steps are deterministic form actions: greedy decoding, capped output length
+    # and a fixed context window (bounds KV cache memory per request)
+    return ChatOllama(
+        model=settings.OLLAMA_MODEL,
+        base_url=settings.OLLAMA_HOST,
+        temperature=settings.AGENT_TEMPERATURE,
+        top_k=1 if settings.AGENT_TEMPERATURE == 0 else None,
+        num_predict=settings.AGENT_NUM_PREDICT,
+        num_ctx=settings.OLLAMA_NUM_CTX,
+        keep_alive=settings.OLLAMA_KEEP_ALIVE,
+    )
+
+
 class BrowserUseService:
     """
     AI-powered browser automation service using Browser Use library.
@@ -84,6 +304,8 @@ class BrowserUseService:
         self.api_key = settings.BROWSER_USE_API_KEY
         self.llm = None
         self.cloud_client = None
+        # Caps agents running at once in submit_to_directories
+        self._semaphore = asyncio.Semaphore(settings.CONCURRENT_SUBMISSIONS)
 
         if self.use_cloud:
             if not self.api_key:
@@ -92,7 +314,11 @@ class BrowserUseService:
             os.environ["BROWSER_USE_API_KEY"] = self.api_key
 
             try:
-                self.cloud_client = AsyncBrowserUse(api_key=self.api_key)
+                from browser_use_sdk import AsyncBrowserUse
+
+                self.cloud_client = AsyncBrowserUse(
+                    api_key=self.api_key, httpx_client=_get_cloud_http_client()
+                )
                 logger.info("🌐 BrowserUseService initialized with Browser Use Cloud API")
             except ImportError:
                 logger.error(
@@ -100,17 +326,41 @@ class BrowserUseService:
                 )
                 raise
         else:
-            from langchain_ollama import ChatOllama
-
-            self.llm = ChatOllama(
-                model=settings.OLLAMA_MODEL,
-                base_url=settings.OLLAMA_HOST,
-                temperature=settings.AI_TEMPERATURE,
+            self.llm = _get_local_llm()
+            self._warmup_task = None
+            if settings.LOCAL_LLM_BACKEND == "ollama":
+                try:
+                    self._warmup_task = asyncio.get_running_loop().create_task(self._warmup())
+                except RuntimeError:
+                    # Created outside an event loop, first submission pays the model load
+                    pass
+            model = (
+                settings.VLLM_MODEL if settings.LOCAL_LLM_BACKEND == "vllm" else settings.OLLAMA_MODEL
             )
             logger.info(
-                f"💻 BrowserUseService initialized with local Ollama: {settings.OLLAMA_MODEL}"
+                f"💻 BrowserUseService initialized with local {settings.LOCAL_LLM_BACKEND}: {model}"
             )
 
+    async def _warmup(self):
+        """Load the Ollama model into memory so the first submission is not a cold start."""
+        try:
+            async with httpx.AsyncClient(base_url=settings.OLLAMA_HOST, timeout=300) as client:
+                # An empty prompt makes Ollama load the model without generating anything
+                response = await client.post(
+                    "/api/generate",
+                    json={"model": settings.OLLAMA_MODEL, "keep_alive": settings.OLLAMA_KEEP_ALIVE},
+                )
+                response.raise_for_status()
+                # Decode speed depends on the quantization, worth having in the logs
+                response = await client.post("/api/show", json={"model": settings.OLLAMA_MODEL})
+                response.raise_for_status()
+                quantization = response.json().get("details", {}).get("quantization_level")
+            logger.info(
+                f"Ollama model {settings.OLLAMA_MODEL} preloaded, quantization: {quantization}"
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Ollama warm-up failed: {str(e)}")
+
     async def submit_to_directory(
         self,
         url: str,
@@ -118,7 +368,8 @@ class BrowserUseService:
         login_credentials: Optional[Dict[str, str]] = None,
         requires_url_first: bool = False,
         url_first_selectors: Optional[Dict[str, str]] = None,
-    ) -> Dict:
+        on_step: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> SubmissionResult:
         """
         Submit form to directory using AI-powered browser automation.
         Login and submission are performed in a single continuous browser session.
@@ -129,15 +380,24 @@ class BrowserUseService:
             login_credentials: Optional login credentials {username, password, login_url}
             requires_url_first: Whether to submit URL on initial page before form
             url_first_selectors: Selectors for URL-first submission pattern
+            on_step: Optional async callback receiving the agent's step count as it progresses
+                (cloud mode only, the pinned browser-use Agent has no step hook)
 
         Returns:
-            Dict with submission result {success, message, screenshot_path}
+            SubmissionResult with success, message, screenshot_path and the raw agent output
         """
+        if _submission_breaker.is_open(url):
+            logger.warning(f"Skipping {url}: too many recent agent failures")
+            return SubmissionResult(
+                success=False,
+                message="AI submission skipped: directory failed repeatedly, retry later",
+            )
+
         logger.info(f"Starting AI-powered submission to {url}")
 
         try:
             # Build a unified task prompt that handles login + submission in ONE session
-            task_prompt = self._build_unified_task_prompt(
+            instructions, task_prompt = self._build_unified_task_prompt(
                 url=url,
                 form_data=form_data,
                 login_credentials=login_credentials,
@@ -147,61 +407,77 @@ class BrowserUseService:
             logger.info("AI Agent executing unified login + submission task...")
 
             # Create and run agent (cloud or local) - single session for entire workflow
+            # Neither the cloud API nor the pinned browser-use Agent takes extra system
+            # instructions, so they go ahead of the steps in the task itself
+            full_task = f"{instructions}\n\n{task_prompt}"
             if self.use_cloud:
                 # Cloud mode - use browser-use-sdk
-                task = await self.cloud_client.tasks.create_task(task=task_prompt)
+                task = await self.cloud_client.tasks.create_task(task=full_task)
+                try:
+                    # Follow the task as it runs instead of blocking until its final state,
+                    # so a stuck agent is stopped rather than billed until the API gives up
+                    async with asyncio.timeout(settings.CLOUD_TASK_TIMEOUT):
+                        step = 0
+                        async for update in task.stream():
+                            step += 1
+                            logger.debug(f"Cloud task {task.id} step {step}: {update}")
+                            if on_step:
+                                await on_step(step)
+                except TimeoutError:
+                    logger.warning(f"Cloud task {task.id} timed out, stopping it")
+                    await self.cloud_client.tasks.update_task(task_id=task.id, action="stop")
+                    raise
+                # The stream has ended, so this returns the finished task right away
                 result = await task.complete()
-                # Convert TaskView to dict for JSON serialization
-                # Use mode='json' and then recursively convert any remaining datetime objects
-                agent_result = result.model_dump(mode='json') if hasattr(result, 'model_dump') else (
-                    result.dict() if hasattr(result, 'dict') else str(result)
+                submission_result = SubmissionResult(
+                    success=True,
+                    message="Form submitted successfully by Browser Use Cloud",
+                    raw=result,
                 )
-                agent_result = make_json_serializable(agent_result)
-                return {
-                    "success": True,
-                    "message": "Form submitted successfully by Browser Use Cloud",
-                    "screenshot_path": None,
-                    "agent_result": agent_result,
-                }
             else:
                 # Local mode - use browser-use library with Ollama
-                from browser_use import Agent
-
-                agent = Agent(
-                    task=task_prompt,
-                    llm=self.llm,
-                )
+                Agent = _get_agent_cls()
+                agent = Agent(task=full_task, llm=self.llm, browser=_get_local_browser())
                 result = await agent.run()
-                return {
-                    "success": True,
-                    "message": "Form submitted successfully by AI agent",
-                    "screenshot_path": None,
-                    "agent_result": result,
-                }
+                submission_result = SubmissionResult(
+                    success=True,
+                    message="Form submitted successfully by AI agent",
+                    raw=result,
+                )
+
+            _submission_breaker.record_success(url)
+            return submission_result
 
         except Exception as e:
             logger.error(f"Browser Use submission failed: {str(e)}")
-            if self.use_cloud:
-                result = await task.complete()
-                # Convert TaskView to dict for JSON serialization
-                # Use mode='json' and then recursively convert any remaining datetime objects
-                agent_result = result.model_dump(mode='json') if hasattr(result, 'model_dump') else (
-                    result.dict() if hasattr(result, 'dict') else str(result)
-                )
-                agent_result = make_json_serializable(agent_result)
-                return {
-                    "success": False,
-                    "message": f"AI submission failed: {str(e)}",
-                    "screenshot_path": None,
-                    "agent_result": agent_result,
-                }
+            _submission_breaker.record_failure(url)
+            return SubmissionResult(
+                success=False,
+                message=f"AI submission failed: {str(e)}",
+            )
 
-            return {
-                "success": False,
-                "message": f"AI submission failed: {str(e)}",
-                "screenshot_path": None,
-                "agent_result": None,
-            }
+    async def submit_to_directories(
+        self, jobs: List[Dict[str, Any]]
+    ) -> List[Union[SubmissionResult, BaseException]]:
+        """
+        Run several directory submissions concurrently.
+
+        At most CONCURRENT_SUBMISSIONS agents run at once. In local mode, start Ollama with
+        OLLAMA_NUM_PARALLEL >= CONCURRENT_SUBMISSIONS, otherwise the agents' LLM calls
+        queue at the Ollama server and run one at a time anyway.
+
+        Args:
+            jobs: Keyword arguments for submit_to_directory, one dict per submission
+
+        Returns:
+            One result per job, in order. A job that raised yields its exception.
+        """
+
+        async def run_one(job: Dict[str, Any]) -> SubmissionResult:
+            async with self._semaphore:
+                return await self.submit_to_directory(**job)
+
+        return await asyncio.gather(*(run_one(job) for job in jobs), return_exceptions=True)
 
     def _build_unified_task_prompt(
         self,
@@ -209,10 +485,13 @@ class BrowserUseService:
         form_data: Dict[str, Any],
         login_credentials: Optional[Dict[str, str]] = None,
         requires_url_first: bool = False,
-    ) -> str:
+    ) -> Tuple[str, str]:
         """
         Build a unified task prompt that handles login and submission in one continuous session.
 
+        The constant instructions are returned separately from the per-submission steps and
+        sent first, so prefix-caching LLM servers can reuse them across submissions.
+
         Args:
             url: Target submission URL
             form_data: Form data to submit
@@ -220,7 +499,7 @@ class BrowserUseService:
             requires_url_first: Whether URL-first pattern is needed
 
         Returns:
-            Complete task prompt for the AI agent
+            Tuple of (instructions, steps) for the AI agent
         """
         steps = []
         step_num = 1
@@ -254,26 +533,14 @@ class BrowserUseService:
             step_num += 1
 
         # Step: Fill and submit the form
+        if requires_url_first:
+            # Already entered in the URL-first step, don't ask the agent to fill it again
+            form_data = {key: value for key, value in form_data.items() if key != "website_url"}
         form_fields = self._build_task_prompt(form_data)
         steps.append(f"""Step {step_num}: FILL AND SUBMIT FORM
 {form_fields}""")
 
-        # Combine all steps into one unified prompt
-        steps_text = "\n\n".join(steps)
-
-        unified_prompt = f"""You are performing a directory submission task. Complete ALL steps in order within this single browser session.
-
-            {steps_text}
-
-            IMPORTANT:
-            - Complete all steps in sequence without closing the browser
-            - If login is required, stay logged in for the submission
-            - Wait for each page to fully load before proceeding
-            - If a field cannot be found, skip it and continue
-            - Submit the form and wait for confirmation"""
-
-        return unified_prompt
-
+        return _SUBMISSION_INSTRUCTIONS, "\n\n".join(steps)
 
     def _build_task_prompt(self, form_data: Dict[str, Any]) -> str:
         """
@@ -285,35 +552,12 @@ class BrowserUseService:
         Returns:
             Detailed task prompt for AI agent
         """
-        # Format form data for prompt
-        fields_description = []
-        for key, value in form_data.items():
-            if value:  # Only include non-empty values
-                # Convert key from snake_case to Title Case
-                field_name = key.replace("_", " ").title()
-                fields_description.append(f"- {field_name}: {value}")
-
-        fields_text = "\n".join(fields_description)
-
-        prompt = f"""
-                You are filling out a directory submission form.
-
-                Please find the form on this page and fill in the following information:
-
-                {fields_text}
-
-                Instructions:
-                1. Identify all form fields on the page
-                2. Match the provided data to the appropriate form fields
-                3. Fill in each field with the corresponding value
-                4. Handle any dropdowns, checkboxes, or special input types
-                5. If there are multiple steps, complete each step in order
-                6. Submit the form when all fields are filled
-                7. Wait for confirmation or success message
-
-                Be thorough and accurate. If a field is not found, skip it and continue with others.
-                """
-        return prompt
+        # Only non-empty values are rendered, each as capped compact JSON (see _prompt_value).
+        # Sorted keys keep the token sequence identical for identical data (prefix caching).
+        fields = tuple(
+            (key, _prompt_value(value)) for key, value in sorted(form_data.items()) if value
+        )
+        return _render_task_prompt(fields)
 
     async def analyze_form_structure(self, url: str) -> Dict:
         """
@@ -325,6 +569,11 @@ class BrowserUseService:
         Returns:
             Dict with detected form fields and structure
         """
+        cached = _form_analysis_cache.get(url)
+        if cached is not None:
+            logger.info(f"Using cached form analysis for {url}")
+            return cached
+
         logger.info(f"AI analyzing form structure at {url}")
 
         try:
@@ -344,18 +593,19 @@ class BrowserUseService:
                 task = await self.cloud_client.tasks.create_task(task=analysis_task)
                 result = await task.complete()
             else:
-                from browser_use import Agent
-
+                Agent = _get_agent_cls()
                 agent = Agent(task=analysis_task, llm=self.llm)
                 result = await agent.run()
 
-            return {
+            analysis = {
                 "success": True,
                 "analysis": result,
                 "screenshot_path": None,
-                "is_multi_step": "multi-step" in str(result).lower()
-                or "multiple steps" in str(result).lower(),
+                # Bounded slice caps the scan when result is a large trace object
+                "is_multi_step": bool(_MULTI_STEP_RE.search(str(result)[:100_000])),
             }
+            _form_analysis_cache[url] = analysis
+            return analysis
 
         except Exception as e:
             logger.error(f"Form analysis failed: {str(e)}")
@@ -364,3 +614,9 @@ class BrowserUseService:
                 "message": f"Form analysis failed: {str(e)}",
                 "is_multi_step": False,
             }
+
+
+@lru_cache(maxsize=1)
+def get_browser_use_service() -> BrowserUseService:
+    """Return the process-wide BrowserUseService so its LLM/HTTP clients stay warm."""
+    return BrowserUseService()
@@ -6,24 +6,101 @@ Handles filling form fields, clicking buttons, and multi-step form navigation.
 
 import asyncio
 import os
-from datetime import datetime
+import re
+import uuid
 from typing import Any, Dict, Optional
 
-from playwright.async_api import BrowserContext, Page
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from app.config import get_settings
+from app.services.browser_manager import BrowserManager
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Candidate buttons combined into one locator so a single query covers all of them
+SUBMIT_LOCATOR = (
+    'button[type="submit"], input[type="submit"], button:has-text("Submit"), '
+    'button:has-text("Send"), button:has-text("Publish"), .submit-button, #submit'
+)
+NEXT_LOCATOR = (
+    'button:has-text("Next"), button:has-text("Continue"), input[value="Next"], '
+    'input[value="Continue"], a:has-text("Next"), .next-button, #next'
+)
+_BUTTON_CLICK_TIMEOUT_MS = 3000
+
+# URL and rendered text just before submit, the baseline for _SUBMITTED_JS
+_PRE_SUBMIT_STATE_JS = """
+() => ({ url: location.href, text: document.body ? document.body.innerText : "" })
+"""
+
+# Resolves once the URL changes or a confirmation message appears after submit. Matches
+# are counted against the baseline so wording already on the form page doesn't count.
+_SUBMITTED_JS = """
+(before) => {
+    const count = (text) => (text.match(/success|thank you|submitted/gi) || []).length;
+    const text = document.body ? document.body.innerText : "";
+    return location.href !== before.url || count(text) > count(before.text);
+}
+"""
+_SUBMIT_WAIT_TIMEOUT_MS = 5000
+
+SUCCESS_RE = re.compile(
+    r"success|thank you|submitted|received|confirmation|pending review|approved", re.IGNORECASE
+)
+ERROR_RE = re.compile(r"error|invalid|failed|required field|please correct|try again", re.IGNORECASE)
+
+# Tests the indicator patterns against the rendered text inside the page. A flash
+# message or alert that clearly says one or the other decides; any other notice (cookie
+# banner, "Welcome back") is ignored and the whole body is scanned, errors included.
+_VERDICT_JS = """
+([successPattern, errorPattern]) => {
+    const success = new RegExp(successPattern, "i");
+    const error = new RegExp(errorPattern, "i");
+    const notices = Array.from(
+        document.querySelectorAll('[role="alert"], [role="status"], .toast, .flash, .alert')
+    ).map((el) => el.innerText).join("\\n").trim();
+    const noticeSuccess = success.test(notices);
+    const noticeError = error.test(notices);
+    if (noticeSuccess !== noticeError) {
+        return { success: noticeSuccess, error: noticeError, preview: notices.slice(0, 200) };
+    }
+    const body = document.body ? document.body.innerText : "";
+    return { success: success.test(body), error: error.test(body), preview: body.slice(0, 200) };
+}
+"""
+
+# Describes a form field in one round trip, null if the selector has no match
+_FIELD_INFO_JS = """
+(selector) => {
+    let el;
+    try {
+        el = document.querySelector(selector);
+    } catch (e) {
+        return null;
+    }
+    if (!el) return null;
+    const style = window.getComputedStyle(el);
+    return {
+        tag: el.tagName.toLowerCase(),
+        type: el.getAttribute("type"),
+        visible: el.getClientRects().length > 0 && style.visibility !== "hidden",
+    };
+}
+"""
+# Poll for up to ~5s for a field to become visible
+_FIELD_PROBE_ATTEMPTS = 20
+_FIELD_PROBE_INTERVAL = 0.25
+
 
 class FormFiller:
     """Handles form filling and submission operations."""
 
-    def __init__(self, context: BrowserContext, browser_timeout: int):
-        self.context = context
+    def __init__(self, browser_manager: BrowserManager, browser_timeout: int):
+        self.browser_manager = browser_manager
         self.browser_timeout = browser_timeout
 
     async def fill_and_submit_form(
@@ -33,6 +110,7 @@ class FormFiller:
         submit_button_selector: Optional[str] = None,
         is_multi_step: bool = False,
         step_count: int = 1,
+        page: Optional[Page] = None,
     ) -> Dict:
         """
         Fill and submit form with support for multi-step forms.
@@ -43,12 +121,26 @@ class FormFiller:
             submit_button_selector: Optional submit button selector
             is_multi_step: Whether form has multiple steps
             step_count: Number of steps in multi-step form
+            page: Page to fill the form on, opened in a fresh context if not given
 
         Returns:
             Dict with success status, message, listing_url, screenshot_path
         """
-        page = await self.context.new_page()
+        async with self.browser_manager.use_page(page) as page:
+            return await self._fill_and_submit_on_page(
+                page, url, field_mapping, submit_button_selector, is_multi_step, step_count
+            )
 
+    async def _fill_and_submit_on_page(
+        self,
+        page: Page,
+        url: str,
+        field_mapping: Dict[str, Any],
+        submit_button_selector: Optional[str],
+        is_multi_step: bool,
+        step_count: int,
+    ) -> Dict:
+        """Run the fill-and-submit flow on the given page."""
         result = {
             "success": False,
             "message": "",
@@ -58,7 +150,6 @@ class FormFiller:
 
         try:
             await page.goto(url, wait_until="domcontentloaded", timeout=self.browser_timeout)
-            await page.wait_for_load_state("networkidle", timeout=10000)
 
             if is_multi_step:
                 # Handle multi-step form
@@ -66,110 +157,130 @@ class FormFiller:
                     logger.info(f"Processing step {step}/{step_count}")
 
                     # Fill fields for current step
-                    for selector, value in field_mapping.items():
-                        if value:
-                            await self._fill_field(page, selector, value)
-                            await asyncio.sleep(0.3)
+                    await self._fill_fields(page, field_mapping)
 
                     # Click Next or Submit button
                     if step < step_count:
                         # Click "Next" button
                         await self._click_next_button(page)
-                        await asyncio.sleep(2)
+                        await page.wait_for_load_state("domcontentloaded")
                     else:
                         # Final step - click "Submit"
+                        pre_submit_state = await page.evaluate(_PRE_SUBMIT_STATE_JS)
                         if submit_button_selector:
                             await self._click_submit_button(page, submit_button_selector)
                         else:
                             await self._find_and_click_submit(page)
             else:
                 # Single-step form
-                for selector, value in field_mapping.items():
-                    if value:
-                        await self._fill_field(page, selector, value)
-                        await asyncio.sleep(0.5)
-
-                # Take screenshot before submit
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                screenshot_dir = os.path.join(settings.UPLOAD_DIR, "screenshots")
-                os.makedirs(screenshot_dir, exist_ok=True)
+                await self._fill_fields(page, field_mapping)
 
-                pre_submit_screenshot = os.path.join(screenshot_dir, f"pre_submit_{timestamp}.png")
-                await page.screenshot(path=pre_submit_screenshot)
-                result["screenshot_path"] = pre_submit_screenshot
+                # Failures are captured below; the filled form is only kept when asked for
+                if settings.SCREENSHOT_ON_SUCCESS:
+                    result["screenshot_path"] = await self._capture_screenshot(page, "pre_submit")
 
                 # Submit
+                pre_submit_state = await page.evaluate(_PRE_SUBMIT_STATE_JS)
                 if submit_button_selector:
                     await self._click_submit_button(page, submit_button_selector)
                 else:
                     await self._find_and_click_submit(page)
 
-            # Wait for submission to complete
-            await asyncio.sleep(3)
+            await self._wait_for_submission(page, pre_submit_state)
 
             # Check result
             current_url = page.url
-            page_content = await page.content()
-
-            success_indicators = [
-                "success",
-                "thank you",
-                "submitted",
-                "received",
-                "confirmation",
-                "pending review",
-                "approved",
-            ]
-
-            page_text = page_content.lower()
-            is_success = any(indicator in page_text for indicator in success_indicators)
-
-            if is_success:
+            # Scan in the page so only the verdict crosses the driver pipe
+            verdict = await page.evaluate(_VERDICT_JS, [SUCCESS_RE.pattern, ERROR_RE.pattern])
+            logger.debug(f"Post-submit page text at {current_url}: {verdict['preview']!r}")
+
+            if verdict["success"]:
                 result["success"] = True
                 result["message"] = "Form submitted successfully"
                 result["listing_url"] = current_url
                 logger.info(f"✅ Successfully submitted to {url}")
+            elif verdict["error"]:
+                result["message"] = "Submission failed - validation errors"
+                result["screenshot_path"] = await self._capture_screenshot(page, "failed")
+                logger.error(f"❌ Form validation errors at {url}")
             else:
-                error_indicators = [
-                    "error",
-                    "invalid",
-                    "failed",
-                    "required field",
-                    "please correct",
-                    "try again",
-                ]
-
-                has_error = any(indicator in page_text for indicator in error_indicators)
-
-                if has_error:
-                    result["message"] = "Submission failed - validation errors"
-                    logger.error(f"❌ Form validation errors at {url}")
-                else:
-                    result["success"] = True
-                    result["message"] = "Form submitted"
-                    result["listing_url"] = current_url
+                result["success"] = True
+                result["message"] = "Form submitted"
+                result["listing_url"] = current_url
 
             return result
 
         except PlaywrightTimeoutError:
             result["message"] = f"Timeout submitting to {url}"
+            result["screenshot_path"] = await self._capture_screenshot(page, "failed")
             logger.error(f"❌ {result['message']}")
             return result
         except Exception as e:
             result["message"] = f"Error: {str(e)}"
+            result["screenshot_path"] = await self._capture_screenshot(page, "failed")
             logger.error(f"❌ {result['message']}")
             return result
-        finally:
-            await page.close()
 
-    async def _fill_field(self, page: Page, selector: str, value: Any):
-        """Fill a single form field."""
+    async def _capture_screenshot(self, page: Page, prefix: str) -> Optional[str]:
+        """Save a JPEG of the current viewport, None if the page can't be captured."""
+        path = f"{self.browser_manager.screenshot_dir}/{prefix}_{uuid.uuid4().hex[:12]}.jpg"
+        try:
+            await page.screenshot(
+                path=path, type="jpeg", quality=settings.SCREENSHOT_QUALITY, timeout=5000
+            )
+        except PlaywrightError as e:
+            logger.warning(f"⚠️ Could not capture screenshot: {str(e)}")
+            return None
+        return path
+
+    async def _wait_for_submission(self, page: Page, pre_submit_state: Dict[str, str]):
+        """Wait until the page navigates away or shows a new confirmation message."""
+        try:
+            await page.wait_for_function(
+                _SUBMITTED_JS, arg=pre_submit_state, timeout=_SUBMIT_WAIT_TIMEOUT_MS
+            )
+        except PlaywrightTimeoutError:
+            # No clear signal, give slow handlers a moment before reading the page
+            await asyncio.sleep(1)
+            return
+
+        if page.url != pre_submit_state["url"]:
+            # The URL flips before the new document is parsed, read the verdict from it
+            await page.wait_for_load_state("domcontentloaded")
+
+    async def _fill_fields(self, page: Page, field_mapping: Dict[str, Any]):
+        """
+        Fill every mapped field that is present on the page.
+
+        Fields are located concurrently, so fields missing from the current step cost
+        one probe timeout in total rather than one each. The fills themselves run in
+        order because typing depends on which element has focus.
+        """
+        fields = [(selector, value) for selector, value in field_mapping.items() if value]
+        infos = await asyncio.gather(*(self._probe_field(page, selector) for selector, _ in fields))
+
+        for (selector, value), info in zip(fields, infos, strict=True):
+            if info:
+                await self._fill_field(page, selector, value, info)
+
+    async def _probe_field(self, page: Page, selector: str) -> Optional[Dict]:
+        """Wait for a field to become visible and describe it, None if it never does."""
         try:
-            await page.wait_for_selector(selector, timeout=5000, state="visible")
-            element = page.locator(selector)
+            for _ in range(_FIELD_PROBE_ATTEMPTS):
+                info = await page.evaluate(_FIELD_INFO_JS, selector)
+                if info and info["visible"]:
+                    return info
+                await asyncio.sleep(_FIELD_PROBE_INTERVAL)
+        except PlaywrightError:
+            pass
+        return None
 
-            tag_name = await element.evaluate("el => el.tagName.toLowerCase()")
-            input_type = await element.get_attribute("type") if tag_name == "input" else None
+    async def _fill_field(self, page: Page, selector: str, value: Any, info: Dict):
+        """Fill a single form field."""
+        try:
+            element = page.locator(selector).first
+            tag_name = info["tag"]
+            input_type = info["type"]
 
             if tag_name == "input" and input_type == "file":
                 if os.path.exists(str(value)):
@@ -180,57 +291,27 @@ class FormFiller:
                 await element.fill(str(value))
             else:
                 await element.fill(str(value))
-        except Exception:
+        except PlaywrightError:
             pass
 
     async def _click_next_button(self, page: Page):
         """Click Next button in multi-step forms."""
-        next_selectors = [
-            'button:has-text("Next")',
-            'button:has-text("Continue")',
-            'input[value="Next"]',
-            'input[value="Continue"]',
-            'a:has-text("Next")',
-            ".next-button",
-            "#next",
-        ]
-
-        for selector in next_selectors:
-            try:
-                if await page.locator(selector).count() > 0:
-                    await page.locator(selector).first.scroll_into_view_if_needed()
-                    await page.locator(selector).first.click()
-                    return
-            except Exception:
-                continue
-
-        raise Exception("Next button not found")
+        await self._click_first(page, NEXT_LOCATOR, "Next button not found")
 
     async def _click_submit_button(self, page: Page, selector: str):
         """Click the submit button."""
-        await page.wait_for_selector(selector, timeout=5000, state="visible")
-        await page.locator(selector).scroll_into_view_if_needed()
-        await page.locator(selector).click()
+        # click() waits for the button to be actionable and scrolls it into view itself
+        await page.locator(selector).first.click(timeout=5000)
 
     async def _find_and_click_submit(self, page: Page):
         """Try to find and click submit button."""
-        selectors = [
-            'button[type="submit"]',
-            'input[type="submit"]',
-            'button:has-text("Submit")',
-            'button:has-text("Send")',
-            'button:has-text("Publish")',
-            ".submit-button",
-            "#submit",
-        ]
-
-        for selector in selectors:
-            try:
-                if await page.locator(selector).count() > 0:
-                    await page.locator(selector).first.scroll_into_view_if_needed()
-                    await page.locator(selector).first.click()
-                    return
-            except Exception:
-                continue
-
-        raise Exception("Submit button not found")
+        await self._click_first(page, SUBMIT_LOCATOR, "Submit button not found")
+
+    async def _click_first(self, page: Page, locator: str, not_found_message: str):
+        """Click the first visible element matching a combined locator."""
+        try:
+            # Hidden matches (templates, collapsed menus) would otherwise win by DOM order
+            button = page.locator(locator).filter(visible=True).first
+            await button.click(timeout=_BUTTON_CLICK_TIMEOUT_MS)
+        except PlaywrightTimeoutError as e:
+            raise Exception(not_found_message) from e
@@ -4,21 +4,35 @@ Login and authentication handling for directory submissions.
 Handles login to directories that require authentication before submission.
 """
 
-import asyncio
 from typing import Optional
 
-from playwright.async_api import BrowserContext
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
+from app.services.browser_manager import BrowserManager
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Common login controls, each combined into one locator
+USERNAME_LOCATOR = (
+    'input[type="email"], input[name="email"], input[name="username"], '
+    'input[id="email"], input[id="username"], #email, #username'
+)
+PASSWORD_LOCATOR = 'input[type="password"], input[name="password"], #password'
+LOGIN_BUTTON_LOCATOR = (
+    'button[type="submit"], input[type="submit"], button:has-text("Log in"), '
+    'button:has-text("Login"), button:has-text("Sign in")'
+)
+_CONTROL_TIMEOUT_MS = 5000
+_LOGIN_WAIT_TIMEOUT_MS = 5000
+
 
 class LoginHandler:
     """Handles directory login operations."""
 
-    def __init__(self, context: BrowserContext, browser_timeout: int):
-        self.context = context
+    def __init__(self, browser_manager: BrowserManager, browser_timeout: int):
+        self.browser_manager = browser_manager
         self.browser_timeout = browser_timeout
 
     async def login_if_required(
@@ -26,6 +40,7 @@ class LoginHandler:
         login_url: Optional[str],
         username: Optional[str],
         password: Optional[str],
+        page: Optional[Page] = None,
     ) -> bool:
         """
         Handle login if directory requires authentication.
@@ -34,6 +49,7 @@ class LoginHandler:
             login_url: URL of the login page
             username: Username or email
             password: Password
+            page: Page to log in on, opened in a fresh context if not given
 
         Returns:
             True if login successful or not required
@@ -41,8 +57,11 @@ class LoginHandler:
         if not login_url or not username or not password:
             return True  # No login required
 
-        page = await self.context.new_page()
+        async with self.browser_manager.use_page(page) as page:
+            return await self._login_on_page(page, login_url, username, password)
 
+    async def _login_on_page(self, page: Page, login_url: str, username: str, password: str) -> bool:
+        """Run the login flow on the given page."""
         try:
             logger.info(f"Logging in to {login_url}")
 
@@ -51,62 +70,35 @@ class LoginHandler:
                 wait_until="domcontentloaded",
                 timeout=self.browser_timeout,
             )
-            await page.wait_for_load_state("networkidle", timeout=10000)
-
-            # Try common login field selectors
-            username_selectors = [
-                'input[type="email"]',
-                'input[name="email"]',
-                'input[name="username"]',
-                'input[id="email"]',
-                'input[id="username"]',
-                "#email",
-                "#username",
-            ]
-
-            password_selectors = [
-                'input[type="password"]',
-                'input[name="password"]',
-                "#password",
-            ]
-
-            # Fill username
-            for selector in username_selectors:
-                try:
-                    if await page.locator(selector).count() > 0:
-                        await page.locator(selector).first.fill(username)
-                        break
-                except Exception:
-                    continue
-
-            # Fill password
-            for selector in password_selectors:
-                try:
-                    if await page.locator(selector).count() > 0:
-                        await page.locator(selector).first.fill(password)
-                        break
-                except Exception:
-                    continue
-
-            # Click login button
-            login_button_selectors = [
-                'button[type="submit"]',
-                'input[type="submit"]',
-                'button:has-text("Log in")',
-                'button:has-text("Login")',
-                'button:has-text("Sign in")',
-            ]
-
-            for selector in login_button_selectors:
-                try:
-                    if await page.locator(selector).count() > 0:
-                        await page.locator(selector).first.click()
-                        break
-                except Exception:
-                    continue
-
-            # Wait for navigation after login
-            await asyncio.sleep(3)
+            login_page_url = page.url
+
+            # Fill credentials and click login, first visible match wins for each locator.
+            # Playwright auto-waits for each control, a missing one is skipped.
+            username_field = page.locator(USERNAME_LOCATOR).filter(visible=True).first
+            password_field = page.locator(PASSWORD_LOCATOR).filter(visible=True).first
+            login_button = page.locator(LOGIN_BUTTON_LOCATOR).filter(visible=True).first
+            try:
+                await username_field.fill(username, timeout=_CONTROL_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                logger.warning(f"⚠️ No username field found on {login_url}")
+
+            try:
+                await password_field.fill(password, timeout=_CONTROL_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                logger.warning(f"⚠️ No password field found on {login_url}")
+
+            try:
+                await login_button.click(timeout=_CONTROL_TIMEOUT_MS)
+            except PlaywrightTimeoutError:
+                logger.warning(f"⚠️ No login button found on {login_url}")
+
+            # Wait for the redirect after login; logins that complete in place just time out
+            try:
+                await page.wait_for_url(
+                    lambda current: current != login_page_url, timeout=_LOGIN_WAIT_TIMEOUT_MS
+                )
+            except PlaywrightTimeoutError:
+                logger.debug(f"No redirect after login on {login_url}")
 
             logger.info("✅ Login successful")
             return True
@@ -114,5 +106,3 @@ class LoginHandler:
         except Exception as e:
             logger.error(f"❌ Login failed: {str(e)}")
             return False
-        finally:
-            await page.close()
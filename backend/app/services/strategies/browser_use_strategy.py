@@ -4,10 +4,17 @@ Browser Use AI-powered submission strategy.
 Uses Qwen2.5-VL vision model to intelligently handle form submissions.
 """
 
-from typing import Dict
+from datetime import datetime
 
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.database import AsyncSessionLocal
 from app.models import Directory, SaasProduct, Submission, SubmissionStatus
-from app.services.browser_use_service import BrowserUseService
+from app.services.browser_use_service import get_browser_use_service
+from app.services.strategies.directory_stats import record_directory_outcome
+from app.services.strategies.product_data import saas_product_to_dict
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,26 +23,12 @@ logger = get_logger(__name__)
 class BrowserUseStrategy:
     """AI-powered submission using Browser Use library."""
 
-    @staticmethod
-    def _saas_product_to_dict(saas_product: SaasProduct) -> Dict:
-        """Convert SaaS product to dict."""
-        return {
-            "name": saas_product.name,
-            "website_url": str(saas_product.website_url),
-            "description": saas_product.description,
-            "short_description": saas_product.short_description,
-            "category": saas_product.category,
-            "logo_url": str(saas_product.logo_url) if saas_product.logo_url else None,
-            "contact_email": saas_product.contact_email,
-            "tagline": saas_product.tagline,
-            "pricing_model": saas_product.pricing_model,
-            "features": saas_product.features,
-            "social_links": saas_product.social_links,
-        }
-
     @staticmethod
     async def execute_submission(
-        submission: Submission, saas_product: SaasProduct, directory: Directory, db
+        submission: Submission,
+        saas_product: SaasProduct,
+        directory: Directory,
+        db: AsyncSession,
     ) -> Submission:
         """
         Execute submission using Browser Use AI.
@@ -51,10 +44,10 @@ class BrowserUseStrategy:
         """
         logger.info(f"🤖 Using Browser Use AI for {directory.name}")
 
-        browser_use = BrowserUseService()
+        browser_use = get_browser_use_service()
 
         # Prepare form data from SaaS product
-        form_data = BrowserUseStrategy._saas_product_to_dict(saas_product)
+        form_data = saas_product_to_dict(saas_product)
 
         # Prepare login credentials if required
         login_credentials = None
@@ -73,6 +66,23 @@ class BrowserUseStrategy:
                 "url_submit_selector": directory.url_submit_selector,
             }
 
+        async def record_step(step: int):
+            # Progress is visible to the API while the agent is still running. It is written
+            # in its own short transaction so it never commits the submission's pending
+            # changes, and a failed write is only logged so it can't fail the submission.
+            try:
+                async with AsyncSessionLocal() as progress_db:
+                    await progress_db.execute(
+                        update(Submission)
+                        .where(Submission.id == submission.id)
+                        .values(current_step=step)
+                    )
+                    await progress_db.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not record progress of submission {submission.id}: {e}")
+                return
+            set_committed_value(submission, "current_step", step)
+
         # AI agent performs the submission
         result = await browser_use.submit_to_directory(
             url=directory.submission_url or directory.url,
@@ -80,31 +90,26 @@ class BrowserUseStrategy:
             login_credentials=login_credentials,
             requires_url_first=directory.requires_url_first,
             url_first_selectors=url_first_selectors,
+            on_step=record_step,
         )
 
         # Update submission based on result
-        if result["success"]:
-            from datetime import datetime
-
+        if result.success:
             submission.status = SubmissionStatus.SUBMITTED
             submission.submitted_at = datetime.now()
-            submission.response_message = result["message"]
-            submission.form_screenshot_url = result.get("screenshot_path")
-            submission.agent_result = result.get("agent_result")
-
-            directory.total_submissions += 1
-            directory.successful_submissions += 1
+            submission.response_message = result.message
+            submission.form_screenshot_url = result.screenshot_path
+            submission.agent_result = result.agent_result
 
             logger.info(f"✅ AI submission {submission.id} to {directory.name} successful")
         else:
             submission.status = SubmissionStatus.FAILED
-            submission.response_message = result["message"]
-            submission.form_screenshot_url = result.get("screenshot_path")
-            submission.agent_result = result.get("agent_result")
-
-            directory.total_submissions += 1
+            submission.response_message = result.message
+            submission.form_screenshot_url = result.screenshot_path
+            submission.agent_result = result.agent_result
 
-            logger.error(f"❌ AI submission {submission.id} failed: {result['message']}")
+            logger.error(f"❌ AI submission {submission.id} failed: {result.message}")
 
-        db.commit()
+        await record_directory_outcome(db, directory, result.success)
+        await db.commit()
         return submission
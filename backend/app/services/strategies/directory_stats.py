@@ -0,0 +1,32 @@
+"""
+Directory submission counters shared by the submission strategies.
+"""
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Directory
+
+
+async def record_directory_outcome(db: AsyncSession, directory: Directory, success: bool):
+    """
+    Count a finished submission against its directory.
+
+    The increment runs in SQL, so concurrent submissions to the same directory don't
+    overwrite each other's counts. It is committed with the caller's transaction.
+
+    Args:
+        db: Database session
+        directory: Target directory
+        success: Whether the submission went through
+    """
+    values = {"total_submissions": Directory.total_submissions + 1}
+    if success:
+        values["successful_submissions"] = Directory.successful_submissions + 1
+
+    await db.execute(
+        update(Directory)
+        .where(Directory.id == directory.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
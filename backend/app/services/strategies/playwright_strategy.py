@@ -4,15 +4,33 @@ Traditional Playwright submission strategy.
 Uses manual form detection and filling with Playwright automation.
 """
 
+import copy
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
+from cachetools import TTLCache
+from playwright.async_api import Page
+from sqlalchemy import JSON, cast, func, literal, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import get_settings
 from app.models import Directory, SaasProduct, Submission, SubmissionStatus
 from app.services.ai_form_reader import AIFormReader
-from app.services.browser_automation import BrowserAutomation
+from app.services.browser_automation import BrowserAutomation, get_browser
+from app.services.browser_manager import session_state_path
+from app.services.strategies.directory_stats import record_directory_outcome
+from app.services.strategies.product_data import saas_product_to_dict
+from app.utils.html import clean_form_html
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
+settings = get_settings()
+
+# AI form analyses by DOM signature; directories sharing a form (same site added by
+# several users, or a re-detection of an unchanged page) skip the LLM call
+_form_structure_cache: TTLCache = TTLCache(maxsize=256, ttl=settings.FORM_ANALYSIS_CACHE_TTL)
 
 
 class PlaywrightStrategy:
@@ -21,25 +39,12 @@ class PlaywrightStrategy:
     def __init__(self, ai_reader: AIFormReader):
         self.ai_reader = ai_reader
 
-    @staticmethod
-    def _saas_product_to_dict(saas_product: SaasProduct) -> Dict:
-        """Convert SaaS product to dict."""
-        return {
-            "name": saas_product.name,
-            "website_url": str(saas_product.website_url),
-            "description": saas_product.description,
-            "short_description": saas_product.short_description,
-            "category": saas_product.category,
-            "logo_url": str(saas_product.logo_url) if saas_product.logo_url else None,
-            "contact_email": saas_product.contact_email,
-            "tagline": saas_product.tagline,
-            "pricing_model": saas_product.pricing_model,
-            "features": saas_product.features,
-            "social_links": saas_product.social_links,
-        }
-
     async def execute_submission(
-        self, submission: Submission, saas_product: SaasProduct, directory: Directory, db
+        self,
+        submission: Submission,
+        saas_product: SaasProduct,
+        directory: Directory,
+        db: AsyncSession,
     ) -> Submission:
         """
         Execute submission using traditional Playwright automation.
@@ -56,14 +61,23 @@ class PlaywrightStrategy:
         logger.info(f"🔧 Using traditional Playwright for {directory.name}")
 
         try:
-            # Use persistent browser context
-            async with BrowserAutomation() as browser:
+            # Reuse the shared, pre-warmed browser
+            browser = await get_browser()
+
+            # One page for the whole submission, so every step shares its session. It lives
+            # in a fresh context that only restores this user's earlier session on the site,
+            # so no cookies carry over from other users' submissions.
+            session_state = session_state_path(
+                submission.user_id, directory.submission_url or directory.url
+            )
+            async with browser.acquire_page(session_state) as page:
                 # Step 1: Login if required
                 if directory.requires_login:
                     login_success = await browser.login_if_required(
                         login_url=directory.login_url,
                         username=directory.login_username,
                         password=directory.login_password,
+                        page=page,
                     )
 
                     if not login_success:
@@ -80,6 +94,7 @@ class PlaywrightStrategy:
                         website_url=saas_product.website_url,
                         url_field_selector=directory.url_field_selector,
                         url_submit_selector=directory.url_submit_selector,
+                        page=page,
                     )
                     logger.info(f"✅ URL submitted, form page: {actual_form_url}")
 
@@ -89,24 +104,23 @@ class PlaywrightStrategy:
                 else:
                     # Analyze form
                     form_structure = await self._analyze_directory_form(
-                        browser, directory, actual_form_url
+                        browser, directory, actual_form_url, page
                     )
 
                     # Cache it
                     directory.detected_form_structure = form_structure
                     directory.last_form_detection = datetime.now()
-                    db.commit()
 
                 # Step 3: Map SaaS data to form fields
-                saas_data = self._saas_product_to_dict(saas_product)
+                saas_data = saas_product_to_dict(saas_product)
                 fields = form_structure.get("fields", [])
                 field_mapping = self.ai_reader.map_saas_data_to_fields(saas_data, fields)
 
                 if not field_mapping:
                     raise Exception("No fields could be mapped")
 
+                # Persisted with the final commit below (or the error path's commit)
                 submission.detected_fields = form_structure
-                db.commit()
 
                 # Step 4: Fill and submit form
                 submission_result = await browser.fill_and_submit_form(
@@ -115,37 +129,34 @@ class PlaywrightStrategy:
                     submit_button_selector=form_structure.get("submit_button_selector"),
                     is_multi_step=directory.is_multi_step,
                     step_count=directory.step_count,
+                    page=page,
                 )
 
-                # Step 5: Update submission status
-                if submission_result["success"]:
-                    submission.status = SubmissionStatus.SUBMITTED
-                    submission.submitted_at = datetime.now()
-                    submission.listing_url = submission_result.get("listing_url")
-                    submission.response_message = submission_result["message"]
+            # Step 5: Update submission status
+            if submission_result["success"]:
+                submission.status = SubmissionStatus.SUBMITTED
+                submission.submitted_at = datetime.now()
+                submission.listing_url = submission_result.get("listing_url")
+                submission.response_message = submission_result["message"]
 
-                    directory.total_submissions += 1
-                    directory.successful_submissions += 1
-
-                    logger.info(f"✅ Submission {submission.id} to {directory.name} successful")
-                else:
-                    submission.status = SubmissionStatus.FAILED
-                    submission.response_message = submission_result["message"]
-                    directory.total_submissions += 1
+                logger.info(f"✅ Submission {submission.id} to {directory.name} successful")
+            else:
+                submission.status = SubmissionStatus.FAILED
+                submission.response_message = submission_result["message"]
 
-                    logger.error(f"❌ Submission {submission.id} to {directory.name} failed")
+                logger.error(f"❌ Submission {submission.id} to {directory.name} failed")
 
-                # Store data
-                submission.submission_data = {
-                    "field_mapping": {k: str(v) for k, v in field_mapping.items()},
-                    "form_structure": form_structure,
-                }
+            # Store data
+            submission.submission_data = {
+                "field_mapping": {k: str(v) for k, v in field_mapping.items()},
+                "form_structure": form_structure,
+            }
 
-                if submission_result.get("screenshot_path"):
-                    submission.form_screenshot_url = submission_result["screenshot_path"]
+            if submission_result.get("screenshot_path"):
+                submission.form_screenshot_url = submission_result["screenshot_path"]
 
-                db.commit()
-                db.refresh(submission)
+            await record_directory_outcome(db, directory, submission_result["success"])
+            await db.commit()
 
             return submission
 
@@ -155,25 +166,49 @@ class PlaywrightStrategy:
             submission.status = SubmissionStatus.FAILED
             submission.response_message = f"Error: {str(e)}"
 
-            if not submission.error_log:
-                submission.error_log = []
-
-            submission.error_log.append({"timestamp": datetime.now().isoformat(), "error": str(e)})
-
-            db.commit()
-            db.refresh(submission)
+            # Appended in SQL, so a long log isn't rewritten from Python on every failure
+            entry = {"timestamp": datetime.now().isoformat(), "error": str(e)}
+            existing_log = func.coalesce(cast(Submission.error_log, JSONB), literal([], JSONB))
+            appended_log = existing_log.op("||")(literal([entry], JSONB))
+            error_log = await db.scalar(
+                update(Submission)
+                .where(Submission.id == submission.id)
+                .values(error_log=cast(appended_log, JSON))
+                .returning(Submission.error_log)
+                .execution_options(synchronize_session=False)
+            )
+            # Keep the returned record current without marking the column dirty
+            set_committed_value(submission, "error_log", error_log)
+
+            await db.commit()
 
             return submission
 
     async def _analyze_directory_form(
-        self, browser: BrowserAutomation, directory: Directory, form_url: str = None
+        self,
+        browser: BrowserAutomation,
+        directory: Directory,
+        form_url: str = None,
+        page: Optional[Page] = None,
     ) -> Dict:
         """Analyze directory form structure using existing browser context."""
         url = form_url or directory.submission_url or directory.url
-        screenshot_path, html_content = await browser.navigate_and_screenshot(url)
+        screenshot_path, html_content = await browser.navigate_and_screenshot(url, page=page)
+
+        # Clean once and reuse for both the prompt and the structure fingerprint
+        form_html, dom_signature = clean_form_html(html_content)
+
+        cached = _form_structure_cache.get(dom_signature)
+        if cached is not None:
+            logger.info(f"Reusing form analysis for unchanged form at {url}")
+            # Deep copy: callers store and may edit the nested field list
+            return copy.deepcopy(cached)
 
         form_structure = await self.ai_reader.analyze_form_from_screenshot(
-            screenshot_path=screenshot_path, html_content=html_content
+            screenshot_path=screenshot_path, html_content=form_html
         )
+        form_structure["dom_signature"] = dom_signature
+        if form_structure.get("fields"):
+            _form_structure_cache[dom_signature] = copy.deepcopy(form_structure)
 
         return form_structure
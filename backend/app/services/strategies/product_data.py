@@ -0,0 +1,45 @@
+"""
+SaaS product data shared by the submission strategies.
+"""
+
+from typing import Dict
+
+from cachetools import LRUCache
+
+from app.models import SaasProduct
+
+# Keyed on (id, updated_at), so an edited product gets a fresh entry
+_product_data_cache: LRUCache = LRUCache(maxsize=256)
+
+
+def saas_product_to_dict(saas_product: SaasProduct) -> Dict:
+    """
+    Convert a SaaS product to the form data handed to the strategies.
+
+    The dict is built once per product version and shared between submissions, so
+    callers must not modify it.
+
+    Args:
+        saas_product: SaaS product record
+
+    Returns:
+        Dict of product fields by form data name
+    """
+    key = (saas_product.id, saas_product.updated_at)
+    data = _product_data_cache.get(key)
+    if data is None:
+        data = {
+            "name": saas_product.name,
+            "website_url": str(saas_product.website_url),
+            "description": saas_product.description,
+            "short_description": saas_product.short_description,
+            "category": saas_product.category,
+            "logo_url": str(saas_product.logo_url) if saas_product.logo_url else None,
+            "contact_email": saas_product.contact_email,
+            "tagline": saas_product.tagline,
+            "pricing_model": saas_product.pricing_model,
+            "features": saas_product.features,
+            "social_links": saas_product.social_links,
+        }
+        _product_data_cache[key] = data
+    return data
@@ -5,21 +5,34 @@ Handles two-step submission where URL is submitted first,
 then redirects to the full form (e.g., SaaSHub pattern).
 """
 
-import asyncio
 from typing import Optional
 
-from playwright.async_api import BrowserContext
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Locator, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
+from app.services.browser_manager import BrowserManager
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Common controls on URL-first pages, each combined into one locator
+URL_FIELD_LOCATOR = (
+    'input[name="url"], input[id="url"], input[type="url"], input[placeholder*="website"], '
+    'input[placeholder*="URL"], #service_url, input[name="website"]'
+)
+CONTINUE_BUTTON_LOCATOR = (
+    'button:has-text("Continue"), input[value="Continue"], button[type="submit"], '
+    'input[type="submit"], button:has-text("Next"), button:has-text("Submit")'
+)
+_NAVIGATION_WAIT_TIMEOUT_MS = 5000
+
 
 class URLSubmissionHandler:
     """Handles URL-first submission pattern."""
 
-    def __init__(self, context: BrowserContext, browser_timeout: int):
-        self.context = context
+    def __init__(self, browser_manager: BrowserManager, browser_timeout: int):
+        self.browser_manager = browser_manager
         self.browser_timeout = browser_timeout
 
     async def submit_url_first_step(
@@ -28,6 +41,7 @@ class URLSubmissionHandler:
         website_url: str,
         url_field_selector: Optional[str] = None,
         url_submit_selector: Optional[str] = None,
+        page: Optional[Page] = None,
     ) -> str:
         """
         Handle two-step submission where URL is submitted first.
@@ -37,6 +51,7 @@ class URLSubmissionHandler:
             website_url: Website URL to submit
             url_field_selector: Optional CSS selector for URL input
             url_submit_selector: Optional CSS selector for submit button
+            page: Page to run the step on, opened in a fresh context if not given
 
         Returns:
             URL of the form page after URL submission
@@ -45,97 +60,57 @@ class URLSubmissionHandler:
             SaaSHub requires submitting URL on /services/submit,
             then redirects to /services/new?url=... for the full form.
         """
-        page = await self.context.new_page()
+        async with self.browser_manager.use_page(page) as page:
+            return await self._submit_url_first_on_page(
+                page, initial_url, website_url, url_field_selector, url_submit_selector
+            )
 
+    async def _submit_url_first_on_page(
+        self,
+        page: Page,
+        initial_url: str,
+        website_url: str,
+        url_field_selector: Optional[str],
+        url_submit_selector: Optional[str],
+    ) -> str:
+        """Run the URL-first step on the given page."""
         try:
             await page.goto(initial_url, wait_until="domcontentloaded", timeout=self.browser_timeout)
-            await page.wait_for_load_state("networkidle", timeout=10000)
-            await asyncio.sleep(2)
 
-            # Find and fill URL field
-            url_field_selectors = (
-                [
-                    url_field_selector,
-                    'input[name="url"]',
-                    'input[id="url"]',
-                    'input[type="url"]',
-                    'input[placeholder*="website"]',
-                    'input[placeholder*="URL"]',
-                    "#service_url",
-                    'input[name="website"]',
-                ]
-                if url_field_selector
-                else [
-                    'input[name="url"]',
-                    'input[id="url"]',
-                    'input[type="url"]',
-                    'input[placeholder*="website"]',
-                    'input[placeholder*="URL"]',
-                    "#service_url",
-                    'input[name="website"]',
-                ]
-            )
+            # Wait for the URL field to render rather than for the network to go quiet,
+            # which never happens on pages that keep polling
+            field_candidates = ", ".join(filter(None, (url_field_selector, URL_FIELD_LOCATOR)))
+            try:
+                await page.locator(field_candidates).first.wait_for(timeout=10000)
+            except PlaywrightTimeoutError:
+                pass  # Reported by the lookup below
 
-            url_filled = False
-            for selector in url_field_selectors:
-                if not selector:
-                    continue
-                try:
-                    if await page.locator(selector).count() > 0:
-                        await page.locator(selector).first.fill(website_url)
-                        url_filled = True
-                        logger.info(f"✅ Filled URL field using selector: {selector}")
-                        break
-                except Exception:
-                    continue
-
-            if not url_filled:
+            # Find and fill URL field
+            url_field = await self._first_match(page, url_field_selector, URL_FIELD_LOCATOR)
+            if url_field is None:
                 raise Exception("Could not find URL input field")
 
-            await asyncio.sleep(0.5)
+            await url_field.fill(website_url)
+            logger.info("✅ Filled URL field")
 
             # Find and click Continue/Submit button
-            submit_selectors = (
-                [
-                    url_submit_selector,
-                    'button:has-text("Continue")',
-                    'input[value="Continue"]',
-                    'button[type="submit"]',
-                    'input[type="submit"]',
-                    'button:has-text("Next")',
-                    'button:has-text("Submit")',
-                ]
-                if url_submit_selector
-                else [
-                    'button:has-text("Continue")',
-                    'input[value="Continue"]',
-                    'button[type="submit"]',
-                    'input[type="submit"]',
-                    'button:has-text("Next")',
-                    'button:has-text("Submit")',
-                ]
-            )
-
-            button_clicked = False
-            for selector in submit_selectors:
-                if not selector:
-                    continue
-                try:
-                    if await page.locator(selector).count() > 0:
-                        await page.locator(selector).first.scroll_into_view_if_needed()
-                        await page.locator(selector).first.click()
-                        button_clicked = True
-                        logger.info(f"✅ Clicked submit button using selector: {selector}")
-                        break
-                except Exception:
-                    continue
-
-            if not button_clicked:
+            button = await self._first_match(page, url_submit_selector, CONTINUE_BUTTON_LOCATOR)
+            if button is None:
                 raise Exception("Could not find Continue/Submit button")
 
-            # Wait for navigation to form page
-            await asyncio.sleep(3)
-            await page.wait_for_load_state("networkidle", timeout=10000)
+            pre_submit_url = page.url
+            await button.scroll_into_view_if_needed()
+            await button.click()
+            logger.info("✅ Clicked submit button")
+
+            # Wait for navigation to form page; some sites swap the form in place instead
+            try:
+                await page.wait_for_url(
+                    lambda current: current != pre_submit_url, timeout=_NAVIGATION_WAIT_TIMEOUT_MS
+                )
+            except PlaywrightTimeoutError:
+                logger.debug(f"No navigation after URL submit on {pre_submit_url}")
+            await page.wait_for_load_state("domcontentloaded")
 
             form_url = page.url
             logger.info(f"✅ Navigated to form page: {form_url}")
@@ -145,5 +120,18 @@ class URLSubmissionHandler:
         except Exception as e:
             logger.error(f"❌ Error in URL submission step: {str(e)}")
             raise
-        finally:
-            await page.close()
+
+    async def _first_match(
+        self, page: Page, preferred_selector: Optional[str], fallback_locator: str
+    ) -> Optional[Locator]:
+        """Return the preferred selector's element if present, else the first fallback match."""
+        for selector in (preferred_selector, fallback_locator):
+            if not selector:
+                continue
+            try:
+                element = page.locator(selector).first
+                if await element.count() > 0:
+                    return element
+            except PlaywrightError:
+                continue
+        return None
@@ -6,12 +6,14 @@ Coordinates submission execution using different strategies (Browser Use AI or P
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List, Optional
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.config import get_settings
+from app.database import AsyncSessionLocal
 from app.models import Directory, SaasProduct, Submission, SubmissionStatus
 from app.services.ai_form_reader import AIFormReader
 from app.services.strategies import BrowserUseStrategy, PlaywrightStrategy
@@ -20,15 +22,20 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 settings = get_settings()
 
+# How often the background loop retries failed submissions
+RETRY_INTERVAL_SECONDS = 30 * 60
+# Failed submissions claimed per retry cycle
+RETRY_BATCH_SIZE = 50
+
 
 class WorkflowManager:
     """Orchestrates the entire submission workflow."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.settings = settings
         self.ai_reader = AIFormReader()
-        self.scheduler = AsyncIOScheduler()
+        self._retry_task: Optional[asyncio.Task] = None
         self.is_running = False
 
         # Initialize strategies
@@ -40,69 +47,167 @@ class WorkflowManager:
     ) -> Submission:
         """Execute single submission with Browser Use AI or traditional automation."""
         # Get SaaS product and directory
-        saas_product = self.db.query(SaasProduct).filter(SaasProduct.id == saas_product_id).first()
+        saas_product = await self.db.get(SaasProduct, saas_product_id)
 
-        directory = self.db.query(Directory).filter(Directory.id == directory_id).first()
+        directory = await self.db.get(Directory, directory_id)
 
         if not saas_product or not directory:
             raise ValueError("SaaS product or directory not found")
 
+        return await self._run_submission(saas_product, directory, user_id)
+
+    async def _run_submission(
+        self,
+        saas_product: SaasProduct,
+        directory: Directory,
+        user_id: int,
+        db: Optional[AsyncSession] = None,
+    ) -> Submission:
+        """Create the submission record and run the configured strategy for it."""
+        db = db or self.db
+
         # Create submission record
         submission = Submission(
             user_id=user_id,
-            saas_product_id=saas_product_id,
-            directory_id=directory_id,
+            saas_product_id=saas_product.id,
+            directory_id=directory.id,
             status=SubmissionStatus.PENDING,
         )
-        self.db.add(submission)
-        self.db.commit()
-        self.db.refresh(submission)
+        db.add(submission)
+        await db.flush()
+        await db.refresh(submission)
+        # Committing after the refresh returns the connection to the pool for the
+        # minutes of browser work that follow
+        await db.commit()
 
         try:
             # Choose strategy based on configuration
             if settings.USE_BROWSER_USE_CLOUD:
                 return await self.browser_use_strategy.execute_submission(
-                    submission, saas_product, directory, self.db
+                    submission, saas_product, directory, db
                 )
             else:
                 return await self.playwright_strategy.execute_submission(
-                    submission, saas_product, directory, self.db
+                    submission, saas_product, directory, db
                 )
+        except asyncio.CancelledError:
+            # Don't leave a cancelled submission looking like it is still running
+            submission.status = SubmissionStatus.FAILED
+            submission.response_message = "Error: submission cancelled"
+            await db.commit()
+            raise
         except Exception as e:
             logger.error(f"Submission failed: {str(e)}")
             submission.status = SubmissionStatus.FAILED
             submission.response_message = f"Error: {str(e)}"
-            self.db.commit()
+            await db.commit()
             raise
 
     async def bulk_submit(
         self, saas_product_id: int, directory_ids: List[int], user_id: int
     ) -> List[Submission]:
         """Submit to multiple directories concurrently with persistent browser sessions."""
-        submissions = []
+        saas_product = await self.db.get(SaasProduct, saas_product_id)
+        if not saas_product:
+            raise ValueError("SaaS product not found")
+
+        # One query for all directories instead of one per submission
+        directories = {
+            directory.id: directory
+            for directory in await self.db.scalars(
+                select(Directory).where(Directory.id.in_(directory_ids))
+            )
+        }
         semaphore = asyncio.Semaphore(self.settings.CONCURRENT_SUBMISSIONS)
 
+        # Longest expected submissions start first so a slow directory doesn't start last
+        # and stretch the whole batch. The semaphore admits waiters in creation order.
+        durations = await self._average_submission_seconds(directory_ids)
+        ordered_ids = sorted(directory_ids, key=lambda dir_id: -durations.get(dir_id, float("inf")))
+
         async def submit_with_semaphore(directory_id: int):
-            async with semaphore:
+            directory = directories.get(directory_id)
+            if directory is None:
+                logger.error(f"❌ Directory {directory_id} not found")
+                return None
+
+            return await self._run_in_own_session(semaphore, saas_product, directory, user_id)
+
+        # On timeout the task group cancels whatever is still running, which releases its
+        # pages and sessions; submissions that finished in time are still returned
+        tasks: List[asyncio.Task] = []
+        try:
+            async with asyncio.timeout(self.settings.BULK_SUBMIT_TIMEOUT):
+                async with asyncio.TaskGroup() as task_group:
+                    tasks = [
+                        task_group.create_task(submit_with_semaphore(dir_id))
+                        for dir_id in ordered_ids
+                    ]
+        except TimeoutError:
+            logger.warning("⚠️ Bulk submission timed out, cancelled unfinished submissions")
+
+        submissions = [
+            task.result()
+            for task in tasks
+            if not task.cancelled() and isinstance(task.result(), Submission)
+        ]
+
+        logger.info(f"✅ Bulk submission completed: {len(submissions)}/{len(directory_ids)}")
+
+        return submissions
+
+    async def _run_in_own_session(
+        self,
+        semaphore: asyncio.Semaphore,
+        saas_product: SaasProduct,
+        directory: Directory,
+        user_id: int,
+    ) -> Optional[Submission]:
+        """Run one of several concurrent submissions; failures are logged, not raised."""
+        # Each task gets its own session, so one submission's commit never flushes
+        # another's half-applied changes. merge(load=False) reuses the preloaded rows.
+        async with semaphore:
+            async with AsyncSessionLocal() as task_db:
                 try:
-                    return await self.submit_to_directory(saas_product_id, directory_id, user_id)
+                    submission = await self._run_submission(
+                        await task_db.merge(saas_product, load=False),
+                        await task_db.merge(directory, load=False),
+                        user_id,
+                        task_db,
+                    )
+                    # Load the committed state before the session closes
+                    await task_db.refresh(submission)
+                    return submission
                 except Exception as e:
-                    logger.error(f"❌ Error submitting to directory {directory_id}: {e}")
+                    logger.error(f"❌ Error submitting to directory {directory.id}: {e}")
                     return None
 
-        tasks = [submit_with_semaphore(dir_id) for dir_id in directory_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=False)
-        submissions = [s for s in results if isinstance(s, Submission)]
+    async def _average_submission_seconds(self, directory_ids: List[int]) -> Dict[int, float]:
+        """
+        Average time from creation to submission per directory, from past submissions.
 
-        logger.info(f"✅ Bulk submission completed: {len(submissions)}/{len(directory_ids)}")
+        Args:
+            directory_ids: Directories to look up
 
-        return submissions
+        Returns:
+            Dict of directory id to average seconds; directories without history are absent
+        """
+        duration = func.extract("epoch", Submission.submitted_at - Submission.created_at)
+        rows = await self.db.execute(
+            select(Submission.directory_id, func.avg(duration))
+            .where(
+                Submission.directory_id.in_(directory_ids),
+                Submission.submitted_at.isnot(None),
+            )
+            .group_by(Submission.directory_id)
+        )
+        return {directory_id: float(seconds) for directory_id, seconds in rows}
 
     async def retry_failed_submissions(self):
         """Retry failed submissions."""
-        failed = (
-            self.db.query(Submission)
-            .filter(
+        eligible = (
+            select(Submission.id)
+            .where(
                 Submission.status == SubmissionStatus.FAILED,
                 Submission.retry_count < Submission.max_retries,
                 (Submission.last_retry_at.is_(None))
@@ -111,38 +216,65 @@ class WorkflowManager:
                     < datetime.now() - timedelta(seconds=self.settings.RETRY_DELAY)
                 ),
             )
-            .all()
+            .limit(RETRY_BATCH_SIZE)
+            # Rows another worker is claiming are left to it instead of being retried twice
+            .with_for_update(skip_locked=True)
         )
+        # Claim and bump the retry bookkeeping of the whole batch in one statement
+        claimed_ids = (
+            await self.db.scalars(
+                update(Submission)
+                .where(Submission.id.in_(eligible))
+                .values(
+                    retry_count=Submission.retry_count + 1,
+                    last_retry_at=datetime.now(),
+                    status=SubmissionStatus.PENDING,
+                )
+                .returning(Submission.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await self.db.commit()
+        if not claimed_ids:
+            return
 
-        for submission in failed:
-            try:
-                submission.retry_count += 1
-                submission.last_retry_at = datetime.now()
-                submission.status = SubmissionStatus.PENDING
-                self.db.commit()
-
-                await self.submit_to_directory(
-                    submission.saas_product_id, submission.directory_id, submission.user_id
+        claimed = await self.db.scalars(
+            select(Submission)
+            # Product and directory for every row in two queries instead of two per row
+            .options(selectinload(Submission.saas_product), selectinload(Submission.directory))
+            .where(Submission.id.in_(claimed_ids))
+        )
+        semaphore = asyncio.Semaphore(self.settings.CONCURRENT_SUBMISSIONS)
+        await asyncio.gather(
+            *(
+                self._run_in_own_session(
+                    semaphore, submission.saas_product, submission.directory, submission.user_id
                 )
-            except Exception as e:
-                logger.error(f"❌ Retry failed for submission {submission.id}: {e}")
+                for submission in claimed
+            )
+        )
 
     def start_scheduler(self):
-        """Start background scheduler."""
+        """Start the background retry loop."""
         if self.is_running:
             return
 
         self.is_running = True
-
-        self.scheduler.add_job(
-            self.retry_failed_submissions, "interval", minutes=30, id="retry_failed"
-        )
-
-        self.scheduler.start()
+        self._retry_task = asyncio.create_task(self._retry_loop())
         logger.info("✅ Scheduler started")
 
     def stop_scheduler(self):
-        """Stop scheduler."""
-        if self.scheduler.running:
-            self.scheduler.shutdown()
+        """Stop the background retry loop."""
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            self._retry_task = None
         self.is_running = False
+
+    async def _retry_loop(self):
+        """Retry failed submissions every RETRY_INTERVAL_SECONDS until stopped."""
+        while self.is_running:
+            await asyncio.sleep(RETRY_INTERVAL_SECONDS)
+            try:
+                await self.retry_failed_submissions()
+            except Exception as e:
+                logger.error(f"❌ Retry cycle failed: {e}")
@@ -2,23 +2,53 @@
 Authentication utilities for password hashing, JWT tokens, and credential encryption.
 """
 
-from datetime import datetime, timedelta
-from typing import Any, Dict
+import asyncio
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
 
+import jwt
+from cachetools import TTLCache
 from cryptography.fernet import Fernet
-from jose import JWTError, jwt
+from jwt import PyJWTError
 from passlib.context import CryptContext
+from passlib.hash import argon2
 
 from app.config import get_settings
 
 settings = get_settings()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+# Password hashing context. bcrypt is only kept to verify older hashes, which are
+# re-hashed with Argon2 on the next login (see verify_and_update_password).
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+# Fail at import rather than fall back to the pure-Python argon2pure backend,
+# which is orders of magnitude slower at these costs
+argon2.set_backend("argon2_cffi")
+# argon2-cffi releases the GIL, so hashes run in worker threads; this bounds how many
+# run at once (and the memory they hold) under a burst of logins
+_password_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+
+# Signing key as bytes, so PyJWT doesn't encode the string on every call
+_SECRET_KEY = settings.SECRET_KEY.encode()
+
+# Token lifetimes in seconds; "exp" is encoded as an epoch int
+_ACCESS_TOKEN_TTL = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TOKEN_TTL = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
 
 # Encryption for directory credentials
 _fernet = None
 
+# Verified token payloads, so a token presented on every request is decoded once.
+# Entries never outlive an access token; each hit re-checks the token's own expiry.
+_verified_tokens: TTLCache = TTLCache(maxsize=4096, ttl=_ACCESS_TOKEN_TTL)
+
 
 def get_fernet():
     """Get or create Fernet cipher for credential encryption"""
@@ -46,9 +76,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and re-hash it if its hash uses outdated settings.
+
+    Runs in a worker thread so the event loop keeps serving other requests.
+
+    Args:
+        plain_password: The plain text password
+        hashed_password: The hashed password from database
+
+    Returns:
+        Tuple of (matches, new_hash); new_hash is None unless the stored hash should be replaced
+    """
+    async with _password_hash_slots:
+        return await asyncio.to_thread(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
     """
-    Hash a password using bcrypt.
+    Hash a password using Argon2 in a worker thread.
 
     Args:
         password: Plain text password
@@ -56,7 +105,8 @@ def get_password_hash(password: str) -> str:
     Returns:
         Hashed password string
     """
-    return pwd_context.hash(password)
+    async with _password_hash_slots:
+        return await asyncio.to_thread(pwd_context.hash, password)
 
 
 # JWT Token Functions
@@ -71,15 +121,11 @@ def create_access_token(data: Dict[str, Any], expires_delta: timedelta = None) -
     Returns:
         Encoded JWT token
     """
-    to_encode = data.copy()
-
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    ttl = int(expires_delta.total_seconds()) if expires_delta else _ACCESS_TOKEN_TTL
+    expire = int(time.time()) + ttl
 
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode = {**data, "exp": expire, "type": "access"}
+    encoded_jwt = jwt.encode(to_encode, _SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
@@ -93,11 +139,10 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     Returns:
         Encoded JWT refresh token
     """
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = int(time.time()) + _REFRESH_TOKEN_TTL
 
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode = {**data, "exp": expire, "type": "refresh"}
+    encoded_jwt = jwt.encode(to_encode, _SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
@@ -113,25 +158,26 @@ def verify_token(token: str, token_type: str = "access") -> Dict[str, Any]:
         Decoded token payload
 
     Raises:
-        JWTError: If token is invalid or expired
+        PyJWTError: If token is invalid or expired
         ValueError: If token type doesn't match
     """
+    payload = _verified_tokens.get(token)
+    if payload is not None and payload["exp"] <= time.time():
+        del _verified_tokens[token]
+        payload = None
+
     try:
-        # Decode with options to allow string subject
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-            options={"verify_signature": True},
-        )
+        if payload is None:
+            payload = jwt.decode(token, _SECRET_KEY, algorithms=[settings.ALGORITHM])
+            _verified_tokens[token] = payload
 
         # Verify token type
         if payload.get("type") != token_type:
             raise ValueError(f"Invalid token type. Expected {token_type}")
 
         return payload
-    except JWTError as e:
-        raise JWTError(f"Token verification failed: {str(e)}") from e
+    except PyJWTError as e:
+        raise PyJWTError(f"Token verification failed: {str(e)}") from e
 
 
 # Credential Encryption Functions
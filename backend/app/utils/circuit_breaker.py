@@ -0,0 +1,63 @@
+"""
+Per-key circuit breaker for expensive operations that keep failing.
+"""
+
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+
+class CircuitBreaker:
+    """
+    Opens a circuit for a key after repeated failures within a time window.
+
+    While open, callers should skip the operation. Once the cool-down has passed a
+    single call is let through as a trial while the others keep being skipped: a
+    success closes the circuit, a failure re-opens it for another cool-down. A trial
+    that never reports back (e.g. cancelled) is replaced after one cool-down.
+    """
+
+    def __init__(self, failure_threshold: int, window_seconds: float, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._failures: Dict[str, Deque[float]] = defaultdict(deque)
+        self._opened_at: Dict[str, float] = {}
+        self._trial_started_at: Dict[str, float] = {}
+
+    def is_open(self, key: str) -> bool:
+        """Check whether calls for this key should be skipped."""
+        opened_at = self._opened_at.get(key)
+        if opened_at is None:
+            return False
+        now = time.monotonic()
+        if now - opened_at < self.cooldown_seconds:
+            return True
+
+        trial_started_at = self._trial_started_at.get(key)
+        if trial_started_at is not None and now - trial_started_at < self.cooldown_seconds:
+            # Another caller's trial is still running
+            return True
+
+        # Cool-down over, let this call through as the trial
+        self._trial_started_at[key] = now
+        return False
+
+    def record_success(self, key: str):
+        """Close the circuit and forget past failures."""
+        self._failures.pop(key, None)
+        self._opened_at.pop(key, None)
+        self._trial_started_at.pop(key, None)
+
+    def record_failure(self, key: str):
+        """Record a failure, opening the circuit once the threshold is reached."""
+        now = time.monotonic()
+        failures = self._failures[key]
+        failures.append(now)
+        while failures and now - failures[0] > self.window_seconds:
+            failures.popleft()
+
+        # A failed trial re-opens the circuit even if older failures left the window
+        failed_trial = self._trial_started_at.pop(key, None) is not None
+        if failed_trial or len(failures) >= self.failure_threshold:
+            self._opened_at[key] = now
@@ -0,0 +1,96 @@
+"""
+HTML helpers shared by the form detection pipeline.
+"""
+
+import hashlib
+import re
+
+# Upper bound on the HTML handed to the LLM prompt
+MAX_FORM_HTML_CHARS = 8000
+
+_NOISE_RE = re.compile(
+    r"<!--.*?-->|<(script|style|noscript|svg|template)\b[^>]*>.*?</\1\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_FORM_RE = re.compile(r"<form\b.*?</form\s*>", re.IGNORECASE | re.DOTALL)
+_CONTROL_RE = re.compile(r"<(?:input|select|textarea)\b", re.IGNORECASE)
+# Fewer controls than this inside <form> tags usually means the real fields live
+# outside them (search box form, JS-rendered fields), so the whole page is kept
+MIN_FORM_CONTROLS = 3
+# Page chrome dropped when the whole page is kept
+_CHROME_RE = re.compile(r"<(header|nav|footer|aside)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# Markup kept ahead of the first control in the whole-page fallback (headings, labels)
+CONTROL_CONTEXT_CHARS = 500
+_BETWEEN_TAGS_RE = re.compile(r">\s+<")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Pieces of the form structure that go into the signature
+_CONTROL_TAG_RE = re.compile(r"<(input|select|textarea|button)\b([^>]*)>", re.IGNORECASE)
+_STRUCTURE_ATTR_RE = re.compile(
+    r"(?<![\w-])(name|type|id)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))", re.IGNORECASE
+)
+_LABEL_RE = re.compile(r"<label\b[^>]*>(.*?)</label\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def clean_form_html(html: str, max_chars: int = MAX_FORM_HTML_CHARS) -> tuple[str, str]:
+    """
+    Normalize a page down to its form markup and fingerprint it.
+
+    Scripts, styles and comments are dropped and whitespace is collapsed. If the page's
+    <form> elements hold at least MIN_FORM_CONTROLS inputs only those are kept, otherwise
+    the whole page is used, minus its header, nav, footer and aside, starting shortly
+    before the first control so the fields survive truncation. The signature covers the
+    structure of the kept controls only (see form_signature).
+
+    Args:
+        html: Raw page HTML
+        max_chars: Maximum length of the returned form HTML
+
+    Returns:
+        Tuple of (form_html, dom_signature)
+    """
+    cleaned = _NOISE_RE.sub("", html)
+    forms = "".join(_FORM_RE.findall(cleaned))
+    whole_page = len(_CONTROL_RE.findall(forms)) < MIN_FORM_CONTROLS
+    cleaned = _CHROME_RE.sub("", cleaned) if whole_page else forms
+
+    cleaned = _WHITESPACE_RE.sub(" ", _BETWEEN_TAGS_RE.sub("><", cleaned)).strip()
+    dom_signature = form_signature(cleaned)
+
+    start = 0
+    first_control = _CONTROL_RE.search(cleaned) if whole_page else None
+    if first_control and len(cleaned) > max_chars:
+        start = max(0, first_control.start() - CONTROL_CONTEXT_CHARS)
+
+    return cleaned[start : start + max_chars], dom_signature
+
+
+def form_signature(html: str) -> str:
+    """
+    Fingerprint the structure of the form controls in a piece of HTML.
+
+    Only each control's tag, type, name and id plus the label texts are hashed. Values
+    and hidden inputs (CSRF tokens, nonces) are left out, so reloading an unchanged
+    form gives the same signature.
+
+    Args:
+        html: Form HTML, typically the output of clean_form_html
+
+    Returns:
+        Hex digest identifying the form structure
+    """
+    parts = []
+    for tag, attrs in _CONTROL_TAG_RE.findall(html):
+        values = {
+            key.lower(): next(filter(None, quoted), "")
+            for key, *quoted in _STRUCTURE_ATTR_RE.findall(attrs)
+        }
+        if values.get("type", "").lower() == "hidden":
+            continue
+        control = (tag.lower(), *(values.get(key, "") for key in ("type", "name", "id")))
+        parts.append("|".join(control))
+    for label in _LABEL_RE.findall(html):
+        parts.append(_WHITESPACE_RE.sub(" ", _TAG_RE.sub(" ", label)).strip())
+
+    return hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=16).hexdigest()
@@ -1,29 +1,40 @@
 import logging
+import sys
 
 import colorlog
+import orjson
 
 from app.config import get_settings
 
 settings = get_settings()
 
+_LEVEL = logging.DEBUG if settings.DEBUG else logging.INFO
 
-def get_logger(name: str) -> logging.Logger:
-    """
-    Create and configure a logger with colors.
-    """
-    logger = logging.getLogger(name)
 
-    if logger.handlers:
-        return logger
+class _JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
 
-    logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
 
-    # Console handler with colors
-    console_handler = colorlog.StreamHandler()
-    console_handler.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+def _build_formatter() -> logging.Formatter:
+    """Colors for an interactive terminal, plain text or JSON when output is collected."""
+    if settings.JSON_LOGS:
+        return _JSONFormatter()
+    if not sys.stderr.isatty():
+        # Redirected output (docker, systemd) gains nothing from ANSI color codes
+        return logging.Formatter("%(levelname)-8s %(name)s - %(message)s")
 
-    # Color formatter
-    formatter = colorlog.ColoredFormatter(
+    return colorlog.ColoredFormatter(
         "%(log_color)s%(levelname)-8s%(reset)s %(blue)s%(name)s%(reset)s - %(message)s",
         datefmt=None,
         reset=True,
@@ -38,7 +49,23 @@ def get_logger(name: str) -> logging.Logger:
         style="%",
     )
 
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+# Console handler shared by every logger
+_console_handler = colorlog.StreamHandler()
+_console_handler.setLevel(_LEVEL)
+_console_handler.setFormatter(_build_formatter())
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Create and configure a logger with colors.
+    """
+    logger = logging.getLogger(name)
+
+    if logger.handlers:
+        return logger
+
+    logger.setLevel(_LEVEL)
+    logger.addHandler(_console_handler)
 
     return logger
@@ -0,0 +1,107 @@
+"""
+Regression tests: Playwright submissions of different users never share a browser session.
+
+They drive a real Chromium against a local HTTP server and are skipped when Chromium
+can't be launched (run `playwright install chromium` first).
+"""
+
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.config import get_settings
+from app.services.browser_manager import BrowserManager, session_state_path, shutdown_playwright
+
+
+class _SessionSiteHandler(BaseHTTPRequestHandler):
+    """/login?user=<name> sets a session cookie, /whoami echoes who the cookie belongs to."""
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        headers = {"Content-Type": "text/html"}
+        if parts.path == "/login":
+            user = parse_qs(parts.query)["user"][0]
+            headers["Set-Cookie"] = f"session={user}; Path=/; Max-Age=3600"
+            body = f"logged in as {user}"
+        else:
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            body = cookie["session"].value if "session" in cookie else "anonymous"
+
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(f"<html><body>{body}</body></html>".encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SessionSiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def browser_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "UPLOAD_DIR", str(tmp_path))
+    manager = BrowserManager()
+    try:
+        await manager.initialize()
+    except RuntimeError as e:
+        await shutdown_playwright()
+        pytest.skip(f"Chromium not available: {e}")
+    yield manager
+    await manager.close()
+    await shutdown_playwright()
+
+
+async def _visit(manager: BrowserManager, url: str, storage_state=None) -> str:
+    """Open url in a submission page like PlaywrightStrategy does and return the body text."""
+    async with manager.acquire_page(storage_state) as page:
+        await page.goto(url)
+        return await page.inner_text("body")
+
+
+async def test_two_users_submissions_do_not_share_cookies(browser_manager, site):
+    await _visit(browser_manager, f"{site}/login?user=alice", session_state_path(1, site))
+
+    assert await _visit(browser_manager, f"{site}/whoami", session_state_path(2, site)) == (
+        "anonymous"
+    )
+    assert await _visit(browser_manager, f"{site}/whoami") == "anonymous"
+
+
+async def test_concurrent_submissions_do_not_share_cookies(browser_manager, site):
+    async with browser_manager.acquire_page(session_state_path(1, site)) as alice_page:
+        async with browser_manager.acquire_page(session_state_path(2, site)) as bob_page:
+            await alice_page.goto(f"{site}/login?user=alice")
+            await bob_page.goto(f"{site}/whoami")
+
+            assert await bob_page.inner_text("body") == "anonymous"
+
+
+async def test_users_session_carries_over_to_their_next_submission(browser_manager, site):
+    await _visit(browser_manager, f"{site}/login?user=alice", session_state_path(1, site))
+    await _visit(browser_manager, f"{site}/login?user=bob", session_state_path(2, site))
+
+    assert await _visit(browser_manager, f"{site}/whoami", session_state_path(1, site)) == "alice"
+    assert await _visit(browser_manager, f"{site}/whoami", session_state_path(2, site)) == "bob"
+
+
+def test_session_files_are_keyed_by_user_and_host():
+    assert session_state_path(1, "https://dir.example/submit") != session_state_path(
+        2, "https://dir.example/submit"
+    )
+    assert session_state_path(1, "https://dir.example/submit") == session_state_path(
+        1, "https://DIR.example/login"
+    )
+    assert "/../" not in session_state_path(1, "https://../etc")
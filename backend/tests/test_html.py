@@ -0,0 +1,71 @@
+from app.utils.html import CONTROL_CONTEXT_CHARS, clean_form_html
+
+SUBMIT_FORM = (
+    '<form action="/submit">'
+    '<input type="hidden" name="csrf" value="token-1">'
+    '<label for="name">Product name</label><input id="name" name="name" value="">'
+    '<input type="url" name="website">'
+    "<textarea name='description'></textarea>"
+    "</form>"
+)
+
+
+def test_keeps_only_forms_with_enough_controls():
+    html = f"<html><body><h1>Submit</h1><p>Intro</p>{SUBMIT_FORM}<p>Footer</p></body></html>"
+
+    form_html, _ = clean_form_html(html)
+
+    assert form_html == SUBMIT_FORM
+
+
+def test_drops_scripts_styles_comments_and_whitespace():
+    html = (
+        "<form>\n  <!-- note --><script>var x = 1;</script><style>p {}</style>\n"
+        '  <input name="a">\n  <input name="b">\n  <input name="c">\n</form>'
+    )
+
+    form_html, _ = clean_form_html(html)
+
+    assert form_html == '<form><input name="a"><input name="b"><input name="c"></form>'
+
+
+def test_falls_back_to_page_without_chrome_when_forms_are_small():
+    html = (
+        '<header><form><input name="q" placeholder="Search"></form></header>'
+        "<nav><a href='/'>Home</a></nav>"
+        '<main><input name="name"><input name="website"><textarea name="d"></textarea></main>'
+        "<footer>Copyright</footer>"
+    )
+
+    form_html, _ = clean_form_html(html)
+
+    assert form_html == (
+        '<main><input name="name"><input name="website"><textarea name="d"></textarea></main>'
+    )
+
+
+def test_fallback_slice_starts_near_the_first_control():
+    filler = "<p>Lots of marketing copy before the form.</p>" * 400
+    html = f'<main>{filler}<input name="name"><input name="website"></main>'
+
+    form_html, _ = clean_form_html(html, max_chars=2000)
+
+    assert len(form_html) <= 2000
+    assert form_html.index('<input name="name">') <= CONTROL_CONTEXT_CHARS
+    assert '<input name="website">' in form_html
+
+
+def test_signature_ignores_values_and_hidden_inputs():
+    reloaded = SUBMIT_FORM.replace("token-1", "token-2").replace('value=""', 'value="Acme"')
+
+    assert clean_form_html(SUBMIT_FORM)[1] == clean_form_html(reloaded)[1]
+
+
+def test_signature_changes_with_the_form_structure():
+    extra_field = SUBMIT_FORM.replace("</form>", '<input type="email" name="email"></form>')
+    relabeled = SUBMIT_FORM.replace("Product name", "Company name")
+
+    signature = clean_form_html(SUBMIT_FORM)[1]
+
+    assert clean_form_html(extra_field)[1] != signature
+    assert clean_form_html(relabeled)[1] != signature
@@ -0,0 +1,172 @@
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select, update
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, Base, async_engine, engine
+from app.models import Directory, SaasProduct, Submission, SubmissionStatus, User
+from app.services.workflow_manager import WorkflowManager
+
+requires_postgres = pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (PostgreSQL)"
+)
+
+
+def _manager_with_directories(directories, bulk_timeout=5):
+    """WorkflowManager on a stub session that knows one product and the given directories."""
+    db = MagicMock()
+    db.get = AsyncMock(return_value=SaasProduct(id=1, user_id=1, name="Acme"))
+    db.scalars = AsyncMock(return_value=directories)
+
+    manager = WorkflowManager(db)
+    manager.settings = get_settings().model_copy(update={"BULK_SUBMIT_TIMEOUT": bulk_timeout})
+    manager._average_submission_seconds = AsyncMock(return_value={})
+    return manager
+
+
+async def test_bulk_submit_returns_finished_rows_when_the_batch_times_out():
+    manager = _manager_with_directories(
+        [Directory(id=1, name="fast"), Directory(id=2, name="slow")], bulk_timeout=0.2
+    )
+    cancelled = []
+
+    async def run(semaphore, saas_product, directory, user_id):
+        if directory.id == 2:
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(directory.id)
+                raise
+        return Submission(id=directory.id, directory_id=directory.id)
+
+    manager._run_in_own_session = run
+
+    submissions = await manager.bulk_submit(saas_product_id=1, directory_ids=[1, 2], user_id=1)
+
+    assert [submission.directory_id for submission in submissions] == [1]
+    assert cancelled == [2]
+
+
+async def test_bulk_submit_leaves_out_failed_and_unknown_directories():
+    manager = _manager_with_directories([Directory(id=1, name="ok"), Directory(id=2, name="bad")])
+
+    async def run(semaphore, saas_product, directory, user_id):
+        # _run_in_own_session logs failures and returns None
+        return None if directory.id == 2 else Submission(id=1, directory_id=directory.id)
+
+    manager._run_in_own_session = run
+
+    submissions = await manager.bulk_submit(saas_product_id=1, directory_ids=[1, 2, 3], user_id=1)
+
+    assert [submission.directory_id for submission in submissions] == [1]
+
+
+async def test_bulk_submit_rejects_unknown_product():
+    manager = _manager_with_directories([])
+    manager.db.get = AsyncMock(return_value=None)
+
+    with pytest.raises(ValueError):
+        await manager.bulk_submit(saas_product_id=1, directory_ids=[1], user_id=1)
+
+
+@pytest.fixture
+async def failed_submission_ids():
+    """Three failed, retryable submissions in a freshly created schema."""
+    Base.metadata.create_all(engine)
+    try:
+        async with AsyncSessionLocal() as db:
+            user = User(email="owner@example.com", username="owner", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            product = SaasProduct(
+                user_id=user.id,
+                name="Acme",
+                website_url="https://acme.example",
+                description="Acme product",
+                contact_email="owner@example.com",
+            )
+            directory = Directory(user_id=user.id, name="Dir", url="https://dir.example")
+            db.add_all([product, directory])
+            await db.flush()
+            submissions = [
+                Submission(
+                    user_id=user.id,
+                    saas_product_id=product.id,
+                    directory_id=directory.id,
+                    status=SubmissionStatus.FAILED,
+                    retry_count=0,
+                    max_retries=3,
+                )
+                for _ in range(3)
+            ]
+            db.add_all(submissions)
+            await db.commit()
+            yield [submission.id for submission in submissions]
+    finally:
+        # Pooled asyncpg connections belong to this test's event loop
+        await async_engine.dispose()
+        Base.metadata.drop_all(engine)
+
+
+async def _submissions_by_id():
+    async with AsyncSessionLocal() as db:
+        return {submission.id: submission for submission in await db.scalars(select(Submission))}
+
+
+@requires_postgres
+async def test_retry_claims_failed_rows_and_skips_locked_ones(failed_submission_ids):
+    locked_id, *free_ids = failed_submission_ids
+
+    async with AsyncSessionLocal() as locker:
+        # Another worker holding a row lock, e.g. in the middle of claiming it
+        await locker.execute(select(Submission).where(Submission.id == locked_id).with_for_update())
+        async with AsyncSessionLocal() as db:
+            manager = WorkflowManager(db)
+            manager._run_in_own_session = AsyncMock(return_value=None)
+            await manager.retry_failed_submissions()
+        await locker.rollback()
+
+    assert manager._run_in_own_session.await_count == len(free_ids)
+    rows = await _submissions_by_id()
+    for submission_id in free_ids:
+        assert rows[submission_id].status == SubmissionStatus.PENDING
+        assert rows[submission_id].retry_count == 1
+        assert rows[submission_id].last_retry_at is not None
+    assert rows[locked_id].status == SubmissionStatus.FAILED
+    assert rows[locked_id].retry_count == 0
+
+
+@requires_postgres
+async def test_concurrent_retry_cycles_claim_each_row_once(failed_submission_ids):
+    async def retry_cycle():
+        async with AsyncSessionLocal() as db:
+            manager = WorkflowManager(db)
+            manager._run_in_own_session = AsyncMock(return_value=None)
+            await manager.retry_failed_submissions()
+            return manager._run_in_own_session.await_count
+
+    runs = await asyncio.gather(retry_cycle(), retry_cycle())
+
+    assert sum(runs) == len(failed_submission_ids)
+    rows = await _submissions_by_id()
+    assert all(rows[submission_id].retry_count == 1 for submission_id in failed_submission_ids)
+
+
+@requires_postgres
+async def test_retry_waits_for_retry_delay_before_claiming_again(failed_submission_ids):
+    async with AsyncSessionLocal() as db:
+        manager = WorkflowManager(db)
+        manager._run_in_own_session = AsyncMock(return_value=None)
+        await manager.retry_failed_submissions()
+
+        # Mark them failed again, as a failed retry would
+        await db.execute(update(Submission).values(status=SubmissionStatus.FAILED))
+        await db.commit()
+
+        manager._run_in_own_session.reset_mock()
+        await manager.retry_failed_submissions()
+
+    assert manager._run_in_own_session.await_count == 0